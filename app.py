@@ -1,11 +1,7 @@
 
 import streamlit as st
-st.set_page_config(page_title="QuLab", layout="wide")
-st.sidebar.image("https://www.quantuniversity.com/assets/img/logo5.jpg")
-st.sidebar.divider()
-st.title("QuLab")
-st.divider()
-st.markdown("""
+
+INTRO_MARKDOWN = """
 In this lab, you can explore the concepts of operational risk management through simulation. By adjusting parameters like the number of risk assessment units and the calculation method for residual risk, you can observe how inherent risk, control effectiveness, and other factors influence the overall risk profile.
 
 ### Key Concepts:
@@ -33,9 +29,20 @@ $$\text{Residual Risk} = f(\text{Inherent Risk}, \text{Control Effectiveness})$$
 
 where $f$ can be either an additive function ('Basic' method) or a multiplicative/weighted function ('Weighted' method).
 
-""")
+"""
+
+st.set_page_config(page_title="QuLab", layout="wide")
+st.sidebar.image("https://www.quantuniversity.com/assets/img/logo5.jpg")
+st.sidebar.divider()
+st.title("QuLab")
+st.divider()
 # Your code starts here
-page = st.sidebar.selectbox(label="Navigation", options=["Data Generation and Validation", "Residual Risk Calculation", "Visualizations"])
+from application_pages.performance_panel import enable_from_sidebar, run_performance_panel
+page = st.sidebar.selectbox(label="Navigation", options=["Data Generation and Validation", "Residual Risk Calculation", "Visualizations", "Scenario Analysis", "Panel Analysis"])
+# The intro is long and static: show it on the landing page only, not above every page on every rerun
+if page == "Data Generation and Validation":
+    st.markdown(INTRO_MARKDOWN)
+enable_from_sidebar()
 if page == "Data Generation and Validation":
     from application_pages.page1 import run_page1
     run_page1()
@@ -45,6 +52,13 @@ elif page == "Residual Risk Calculation":
 elif page == "Visualizations":
     from application_pages.page3 import run_page3
     run_page3()
+elif page == "Scenario Analysis":
+    from application_pages.page4 import run_page4
+    run_page4()
+elif page == "Panel Analysis":
+    from application_pages.page5 import run_page5
+    run_page5()
+run_performance_panel()
 # Your code ends
 
 
@@ -0,0 +1,188 @@
+import pandas as pd
+import numpy as np
+
+from application_pages.schema import (INHERENT_RISK_LEVELS, CONTROL_EFFECTIVENESS_LEVELS, RESIDUAL_RISK_LEVELS,
+                                      encode_ratings)
+from application_pages.methods import attach_residuals
+from application_pages.instrumentation import timed
+
+# The chart aggregations reduce a register of any size to the small grids the page3 charts draw,
+# so the Vega-Lite payload depends on the number of distinct cells, not the number of units.
+# None of them modify the input frame.
+
+SCATTER_SAMPLES_PER_CELL = 10
+SCATTER_JITTER = 0.3 # Half-width of the uniform jitter applied to sampled points, in axis units
+
+def residual_risk_codes(df):
+    """Returns Residual_Risk_Rating as codes 0-2 into RESIDUAL_RISK_LEVELS (-1 for anything else)."""
+    return encode_ratings(df['Residual_Risk_Rating'], RESIDUAL_RISK_LEVELS)
+
+def _check_residual_ratings(rating_codes):
+    if (rating_codes < 0).any():
+        raise ValueError("Residual_Risk_Rating must be categorical with levels 'Low', 'Medium', or 'High'.")
+
+# Each aggregation is an additive count table (scatter_counts, trend_counts, heatmap_counts) plus a
+# finishing step that turns it into the chart frame. Count tables of disjoint sets of units add up,
+# and subtract, exactly, so a register that grows or shrinks only has to count the changed units.
+
+def scatter_counts(df):
+    """Units per (Process_Complexity, Residual_Risk_Rating): one row per complexity value, one column per rating.
+
+    Raises ValueError if a Residual_Risk_Rating is not Low/Medium/High.
+    """
+    rating_codes = residual_risk_codes(df)
+    _check_residual_ratings(rating_codes)
+
+    complexity_codes, complexity_values = pd.factorize(df['Process_Complexity'], sort=True)
+    num_ratings = len(RESIDUAL_RISK_LEVELS)
+    cell = np.where(complexity_codes >= 0, complexity_codes * num_ratings + rating_codes, -1) # -1: no complexity
+    counts = np.bincount(cell[cell >= 0], minlength=len(complexity_values) * num_ratings)
+    return pd.DataFrame(counts.reshape(-1, num_ratings), columns=RESIDUAL_RISK_LEVELS,
+                        index=pd.Index(np.asarray(complexity_values), name='Process_Complexity'))
+
+def scatter_from_counts(counts):
+    """The scatter cells (one row per observed cell with unit_count) from a scatter_counts table."""
+    num_ratings = len(RESIDUAL_RISK_LEVELS)
+    flat = counts.to_numpy().ravel()
+    observed = np.flatnonzero(flat)
+    return pd.DataFrame({
+        'Process_Complexity': counts.index.to_numpy()[observed // num_ratings],
+        'Residual_Risk_Rating': np.array(RESIDUAL_RISK_LEVELS, dtype=object)[observed % num_ratings],
+        'Residual_Risk_Rating_Numerical': observed % num_ratings + 1,
+        'unit_count': flat[observed],
+    })
+
+def scatter_samples(df, num_cells, samples_per_cell=SCATTER_SAMPLES_PER_CELL, seed=0):
+    """At most samples_per_cell jittered units per scatter cell, drawn from a bounded candidate set.
+
+    Only the candidates (a few times the sample budget for num_cells cells) are read, so the cost
+    does not grow with the size of df.
+    """
+    # Draw a bounded random candidate set and keep the first samples_per_cell candidates of each
+    # cell. Counts stay exact; only the drawn points are sampled.
+    rng = np.random.default_rng(seed)
+    budget = min(len(df), 4 * samples_per_cell * max(num_cells, 1))
+    candidates = np.sort(rng.choice(len(df), size=budget, replace=False))
+    candidate_df = df.iloc[candidates]
+    rating_codes = residual_risk_codes(candidate_df)
+    complexity_codes, _ = pd.factorize(candidate_df['Process_Complexity'], sort=True)
+    cell = np.where((complexity_codes >= 0) & (rating_codes >= 0), complexity_codes * len(RESIDUAL_RISK_LEVELS) + rating_codes, -1)
+    order = np.argsort(cell, kind='stable')
+    candidate_cells = cell[order]
+    rank = np.arange(len(order)) - np.searchsorted(candidate_cells, candidate_cells)
+    picked = order[(rank < samples_per_cell) & (candidate_cells >= 0)]
+
+    tooltip_columns = [col for col in ('Risk_Assessment_Unit_ID', 'Inherent_Risk_Rating', 'Control_Effectiveness_Rating')
+                       if col in df.columns]
+    samples = candidate_df[tooltip_columns + ['Process_Complexity', 'Residual_Risk_Rating']].iloc[picked].reset_index(drop=True)
+    samples['Residual_Risk_Rating'] = samples['Residual_Risk_Rating'].astype(str)
+    samples['Residual_Risk_Rating_Numerical'] = rating_codes[picked] + 1
+    # Jittered positions are rounded so they don't bloat the chart JSON with 17-digit floats
+    jitter = rng.uniform(-SCATTER_JITTER, SCATTER_JITTER, (2, len(picked))).round(3)
+    samples['Process_Complexity_Jittered'] = samples['Process_Complexity'] + jitter[0]
+    samples['Residual_Risk_Rating_Jittered'] = samples['Residual_Risk_Rating_Numerical'] + jitter[1]
+    return samples
+
+@timed('aggregate_scatter')
+def aggregate_scatter(df, samples_per_cell=SCATTER_SAMPLES_PER_CELL, seed=0):
+    """Reduces df to per-(Process_Complexity, Residual_Risk_Rating) counts plus a few jittered sample units.
+
+    Returns (cells, samples). cells has one row per observed cell with unit_count; samples holds at most
+    samples_per_cell units per cell with Process_Complexity_Jittered / Residual_Risk_Rating_Jittered
+    positions and the tooltip columns. Raises ValueError if a Residual_Risk_Rating is not Low/Medium/High.
+    """
+    cells = scatter_from_counts(scatter_counts(df))
+    return cells, scatter_samples(df, len(cells), samples_per_cell, seed)
+
+def trend_counts(df):
+    """Units and the sum of the numerical Residual_Risk_Rating (1-3) per Assessment_Cycle.
+
+    Raises ValueError if a Residual_Risk_Rating is not Low/Medium/High.
+    """
+    rating_codes = residual_risk_codes(df)
+    _check_residual_ratings(rating_codes)
+
+    cycle_codes, cycles = pd.factorize(df['Assessment_Cycle'], sort=True)
+    has_cycle = cycle_codes >= 0
+    counts = np.bincount(cycle_codes[has_cycle], minlength=len(cycles))
+    totals = np.bincount(cycle_codes[has_cycle], weights=rating_codes[has_cycle] + 1, minlength=len(cycles))
+    return pd.DataFrame({'unit_count': counts, 'rating_total': totals},
+                        index=pd.Index(np.asarray(cycles), name='Assessment_Cycle'))
+
+def trend_from_counts(counts):
+    """The trend frame (Assessment_Cycle, Residual_Risk_Rating_Numerical, unit_count) from a trend_counts table."""
+    counts = counts[counts['unit_count'] > 0]
+    return pd.DataFrame({
+        'Assessment_Cycle': counts.index.to_numpy(),
+        'Residual_Risk_Rating_Numerical': counts['rating_total'].to_numpy() / counts['unit_count'].to_numpy(),
+        'unit_count': counts['unit_count'].to_numpy(),
+    })
+
+@timed('aggregate_trend')
+def aggregate_trend(df):
+    """Reduces df to the mean numerical Residual_Risk_Rating (1-3) and unit count per Assessment_Cycle.
+
+    Raises ValueError if a Residual_Risk_Rating is not Low/Medium/High.
+    """
+    return trend_from_counts(trend_counts(df))
+
+def heatmap_counts(df):
+    """Units, rated units and the sum of the numerical residual rating per (Inherent, Control Effectiveness) cell.
+
+    One row per cell of the full grid, in INHERENT_RISK_LEVELS-major order.
+    """
+    inherent_codes = encode_ratings(df['Inherent_Risk_Rating'], INHERENT_RISK_LEVELS)
+    control_codes = encode_ratings(df['Control_Effectiveness_Rating'], CONTROL_EFFECTIVENESS_LEVELS)
+    rating_codes = residual_risk_codes(df)
+
+    num_cells = len(INHERENT_RISK_LEVELS) * len(CONTROL_EFFECTIVENESS_LEVELS)
+    valid = (inherent_codes >= 0) & (control_codes >= 0)
+    cell = (inherent_codes * len(CONTROL_EFFECTIVENESS_LEVELS) + control_codes)[valid]
+    rated = rating_codes[valid] >= 0
+    return pd.DataFrame({
+        'unit_count': np.bincount(cell, minlength=num_cells),
+        'rated_count': np.bincount(cell[rated], minlength=num_cells),
+        'rating_total': np.bincount(cell[rated], weights=rating_codes[valid][rated] + 1, minlength=num_cells),
+    })
+
+def heatmap_from_counts(counts):
+    """The heatmap frame (one row per observed cell with unit_count and avg_residual_score) from a heatmap_counts table."""
+    observed = np.flatnonzero(counts['unit_count'].to_numpy())
+    observed_counts = counts.iloc[observed]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_residual_score = observed_counts['rating_total'].to_numpy() / observed_counts['rated_count'].to_numpy()
+    return pd.DataFrame({
+        'Inherent_Risk_Rating': np.array(INHERENT_RISK_LEVELS, dtype=object)[observed // len(CONTROL_EFFECTIVENESS_LEVELS)],
+        'Control_Effectiveness_Rating': np.array(CONTROL_EFFECTIVENESS_LEVELS, dtype=object)[observed % len(CONTROL_EFFECTIVENESS_LEVELS)],
+        'unit_count': observed_counts['unit_count'].to_numpy(),
+        'avg_residual_score': avg_residual_score,
+    })
+
+@timed('aggregate_heatmap')
+def aggregate_heatmap(df):
+    """Reduces df to unit_count and avg_residual_score per observed (Inherent, Control Effectiveness) cell.
+
+    Units whose residual rating is not Low/Medium/High count towards unit_count but not the average.
+    """
+    return heatmap_from_counts(heatmap_counts(df))
+
+def chart_counts(df):
+    """The count tables behind every page3 chart of df: 'scatter', 'heatmap' and, with Assessment_Cycle, 'trend'."""
+    counts = {'scatter': scatter_counts(df), 'heatmap': heatmap_counts(df)}
+    if 'Assessment_Cycle' in df.columns:
+        counts['trend'] = trend_counts(df)
+    return counts
+
+def calculate_all_chart_counts(df, residuals):
+    """chart_counts of df scored by each method, for compute_residuals output residuals."""
+    return {method: chart_counts(attach_residuals(df, residual_columns)) for method, residual_columns in residuals.items()}
+
+def add_chart_counts(counts, delta, sign=1):
+    """Returns counts with the chart_counts of a disjoint set of units added (sign=1) or removed (sign=-1)."""
+    combined = {}
+    for name, table in counts.items():
+        if table.index.equals(delta[name].index):
+            combined[name] = table + sign * delta[name]
+        else: # New Process_Complexity values or cycles: align on the union, keeping the count dtypes
+            combined[name] = table.add(sign * delta[name], fill_value=0).astype(table.dtypes.to_dict())
+    return combined
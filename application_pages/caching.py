@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entry and counts hits and misses."""
+
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for key, calling compute() and storing its result on a miss."""
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = compute() # Exceptions propagate and nothing is cached
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drops every entry and resets the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the hit/miss counters and current size as a dict."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+def session_cache(session_state, name, maxsize):
+    """Returns the LRUCache stored under name in a session-state mapping, creating it on first use."""
+    if name not in session_state:
+        session_state[name] = LRUCache(maxsize)
+    return session_state[name]
@@ -0,0 +1,147 @@
+import pandas as pd
+
+from application_pages.schema import INHERENT_RISK_LEVELS, CONTROL_EFFECTIVENESS_LEVELS
+from application_pages.monte_carlo import share_histogram
+from application_pages.instrumentation import timed
+
+# Altair chart builders over the pre-aggregated frames from application_pages.aggregations. They
+# need no Streamlit, and altair (about as slow to import as Streamlit itself) is imported only
+# when a chart is first built, so importing this module stays cheap for batch jobs and workers.
+
+RESIDUAL_RISK_COLORS = {'Low': '#1f77b4', 'Medium': '#ff7f0e', 'High': '#d62728'}
+_RATING_LABEL_EXPR = "datum.value == 1 ? 'Low' : datum.value == 2 ? 'Medium' : 'High'"
+
+def _residual_risk_color(alt):
+    return alt.Color('Residual_Risk_Rating', scale=alt.Scale(domain=list(RESIDUAL_RISK_COLORS), range=list(RESIDUAL_RISK_COLORS.values())),
+                     legend=alt.Legend(title="Residual Risk"))
+
+def relationship_scatter_chart(cells, samples):
+    """Builds the Process Complexity vs Residual Risk scatter from aggregate_scatter output (cells, samples)."""
+    import altair as alt
+
+    color = _residual_risk_color(alt)
+    y_axis = alt.Axis(title='Residual Risk Rating (Numerical)', values=[1, 2, 3], labelExpr=_RATING_LABEL_EXPR)
+
+    # One translucent bubble per (complexity, rating) cell, sized by the number of units in it
+    cell_layer = alt.Chart(cells).mark_circle(opacity=0.2).encode(
+        x=alt.X('Process_Complexity', axis=alt.Axis(title='Process Complexity')),
+        y=alt.Y('Residual_Risk_Rating_Numerical', axis=y_axis),
+        size=alt.Size('unit_count', legend=alt.Legend(title='Number of Units')),
+        color=color,
+        tooltip=[
+            alt.Tooltip('Process_Complexity'),
+            alt.Tooltip('Residual_Risk_Rating'),
+            alt.Tooltip('unit_count', title='Number of Units')
+        ]
+    )
+
+    sample_layer = alt.Chart(samples).mark_circle(size=60).encode(
+        x=alt.X('Process_Complexity_Jittered', axis=alt.Axis(title='Process Complexity')),
+        y=alt.Y('Residual_Risk_Rating_Jittered', axis=y_axis),
+        tooltip=[alt.Tooltip(col) for col in ('Risk_Assessment_Unit_ID', 'Inherent_Risk_Rating', 'Control_Effectiveness_Rating',
+                                              'Residual_Risk_Rating', 'Process_Complexity') if col in samples.columns],
+        color=color
+    )
+
+    chart = (cell_layer + sample_layer).properties(
+        title='Process Complexity vs Residual Risk Rating'
+    ).interactive()
+
+    return chart
+
+def trend_line_chart(avg_risk):
+    """Builds the trend line from aggregate_trend output (Assessment_Cycle, Residual_Risk_Rating_Numerical, unit_count)."""
+    import altair as alt
+
+    chart = alt.Chart(avg_risk).mark_line(point=True).encode(
+        x=alt.X('Assessment_Cycle:O', axis=alt.Axis(title='Assessment Cycle', format="d")), # :O for ordinal to show all years
+        y=alt.Y('Residual_Risk_Rating_Numerical', axis=alt.Axis(title='Average Residual Risk Rating (Numerical)',
+                                                                 values=[1, 2, 3], labelExpr=_RATING_LABEL_EXPR)),
+        tooltip=[alt.Tooltip('Assessment_Cycle', title='Cycle'), alt.Tooltip('Residual_Risk_Rating_Numerical', title='Avg Risk', format=".2f"),
+                 alt.Tooltip('unit_count', title='Number of Units')]
+    ).properties(
+        title='Trend of Average Residual Risk Rating Over Assessment Cycles'
+    ).interactive()
+
+    return chart
+
+def heatmap_chart(heatmap_data, title='Aggregated Residual Risk by Inherent Risk & Control Effectiveness'):
+    """Builds the heatmap from aggregate_heatmap output."""
+    import altair as alt
+
+    # Define the order for categorical axes for better readability
+    inherent_order = INHERENT_RISK_LEVELS
+    control_order = CONTROL_EFFECTIVENESS_LEVELS # Assuming 'Low' control effectiveness is bad, 'High' is good
+
+    # Define color scale for average residual risk (e.g., green for low, red for high)
+    # Using a sequential multi-hue scale suitable for color-blindness (e.g., 'viridis')
+    color_scale = alt.Scale(domain=[1, 3], scheme='viridis', type='linear') # Viridis for sequential data
+
+    chart = alt.Chart(heatmap_data).mark_rect().encode(
+        x=alt.X('Inherent_Risk_Rating:O', sort=inherent_order, axis=alt.Axis(title='Inherent Risk Rating')),
+        y=alt.Y('Control_Effectiveness_Rating:O', sort=control_order, axis=alt.Axis(title='Control Effectiveness Rating')),
+        color=alt.Color('avg_residual_score:Q', scale=color_scale, legend=alt.Legend(title="Avg. Residual Risk Score")),
+        tooltip=[
+            alt.Tooltip('Inherent_Risk_Rating'),
+            alt.Tooltip('Control_Effectiveness_Rating'),
+            alt.Tooltip('unit_count', title='Number of Units'),
+            alt.Tooltip('avg_residual_score', title='Avg. Residual Score', format=".2f")
+        ]
+    ).properties(
+        title=title
+    )
+
+    # Add text labels for unit count
+    text = chart.mark_text().encode(
+        x=alt.X('Inherent_Risk_Rating:O', sort=inherent_order),
+        y=alt.Y('Control_Effectiveness_Rating:O', sort=control_order),
+        text=alt.Text('unit_count', format='.0f'),
+        color=alt.value('black') # Make text black for readability
+    )
+
+    return (chart + text).interactive()
+
+@timed('chart_build_scenarios')
+def plot_high_share_distribution_altair(scenarios, high_share_threshold):
+    """Generates a histogram of the per-scenario share of High residual risk units, with the threshold marked."""
+    import altair as alt
+
+    histogram = share_histogram(scenarios, 'Share_High')
+
+    bars = alt.Chart(histogram).mark_bar().encode(
+        x=alt.X('bin_start:Q', bin='binned', axis=alt.Axis(title='Share of Units with High Residual Risk', format='%')),
+        x2='bin_end:Q',
+        y=alt.Y('scenario_count:Q', axis=alt.Axis(title='Number of Scenarios')),
+        color=alt.condition(alt.datum.bin_start >= high_share_threshold, alt.value('#d62728'), alt.value('#1f77b4')),
+        tooltip=[
+            alt.Tooltip('bin_start', title='From', format='.1%'),
+            alt.Tooltip('bin_end', title='To', format='.1%'),
+            alt.Tooltip('scenario_count', title='Scenarios')
+        ]
+    )
+    threshold_rule = alt.Chart(pd.DataFrame({'threshold': [high_share_threshold]})).mark_rule(strokeDash=[4, 4]).encode(
+        x='threshold:Q'
+    )
+    return (bars + threshold_rule).properties(
+        title='Distribution of High Residual Risk Share Across Simulated Portfolios'
+    ).interactive()
+
+@timed('chart_build_panel_shares')
+def plot_rating_shares_altair(shares):
+    """Generates a stacked bar chart of the share of units at each residual rating per cycle."""
+    import altair as alt
+
+    return alt.Chart(shares).mark_bar().encode(
+        x=alt.X('Assessment_Cycle:O', axis=alt.Axis(title='Assessment Cycle', format='d')),
+        y=alt.Y('share:Q', stack='normalize', axis=alt.Axis(title='Share of Units', format='%')),
+        color=alt.Color('Residual_Risk_Rating', sort=list(RESIDUAL_RISK_COLORS),
+                        scale=alt.Scale(domain=list(RESIDUAL_RISK_COLORS), range=list(RESIDUAL_RISK_COLORS.values())),
+                        legend=alt.Legend(title='Residual Risk')),
+        order=alt.Order('Residual_Risk_Rating_Order:Q'),
+        tooltip=[alt.Tooltip('Assessment_Cycle', title='Cycle'), alt.Tooltip('Residual_Risk_Rating'),
+                 alt.Tooltip('unit_count', title='Number of Units'), alt.Tooltip('share', format='.1%')]
+    ).transform_calculate(
+        Residual_Risk_Rating_Order="indexof(['Low', 'Medium', 'High'], datum.Residual_Risk_Rating)"
+    ).properties(
+        title='Residual Risk Mix per Assessment Cycle'
+    )
@@ -0,0 +1,189 @@
+import threading
+import weakref
+from collections import Counter, OrderedDict
+
+# Process-wide store of read-only datasets shared by every session. A dataset is loaded once per
+# key (generation parameters or a content hash), sessions hold DatasetHandles instead of frames,
+# and values derived from a dataset (validation report, residual columns) are computed once and
+# shared too. Entries are reference counted: when the last handle is released the entry is kept
+# among the `retain` most recently released ones, then evicted. The store counts hits and misses
+# for dataset loads and for each derived value name, so the pages can show how often work is reused.
+#
+# Nothing hands out the stored frame itself: handle.df is a shallow copy, which with pandas
+# copy-on-write shares the column buffers but turns any write into a private copy, so the shared
+# data cannot be modified through a handle. Copy-on-write is always on from pandas 3.0, which
+# requirements.txt pins; on pandas 2 such a write would change the stored frame for every session.
+
+DEFAULT_RETAIN = 2
+
+class _Entry:
+    __slots__ = ('df', 'derived', 'refcount', 'nbytes', 'lock')
+
+    def __init__(self):
+        self.df = None
+        self.derived = {}
+        self.refcount = 0
+        self.nbytes = 0
+        self.lock = threading.Lock() # Serializes loading and derived computations for this key
+
+class DatasetHandle:
+    """A session's reference to a stored dataset; released explicitly or when garbage collected."""
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    @property
+    def df(self):
+        """A copy-on-write view of the stored frame (no column data is copied)."""
+        return self.store._entry(self.key).df.copy(deep=False)
+
+    def derived(self, name, compute):
+        """Returns the value derived from this dataset under name, calling compute(df) on first use."""
+        return self.store.derived(self.key, name, compute)
+
+    def peek(self, name, default=None):
+        """Returns the value derived under name if it has been computed, else default (never computes it)."""
+        return self.store.peek(self.key, name, default)
+
+    @property
+    def released(self):
+        return not self._finalizer.alive
+
+    def release(self):
+        """Drops this handle's reference; later calls do nothing."""
+        self._finalizer()
+
+class DatasetStore:
+    """Thread-safe, reference-counted map of key -> read-only DataFrame plus derived values."""
+
+    def __init__(self, retain=DEFAULT_RETAIN):
+        if retain < 0:
+            raise ValueError("retain must be a non-negative integer.")
+        self.retain = retain
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._unreferenced = OrderedDict() # Loaded entries with no handles, least recently released first
+        self._hits = Counter() # Keyed by derived value name, None for the datasets themselves
+        self._misses = Counter()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries and self._entries[key].df is not None
+
+    def acquire(self, key, load):
+        """Returns a new handle to the dataset under key, calling load() if it is not stored yet.
+
+        Concurrent acquires of the same key wait for a single load. Exceptions from load propagate
+        and leave nothing stored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            entry.refcount += 1
+            self._unreferenced.pop(key, None)
+        hit = True
+        try:
+            with entry.lock:
+                if entry.df is None:
+                    hit = False
+                    entry.df = load()
+                    entry.nbytes = int(entry.df.memory_usage(index=True, deep=True).sum())
+        except BaseException:
+            self._release(key)
+            raise
+        finally:
+            self._count(None, hit)
+        return DatasetHandle(self, key)
+
+    def derived(self, key, name, compute):
+        """Returns the value derived from the dataset under key, calling compute(df) on first use."""
+        entry = self._entry(key)
+        with entry.lock:
+            hit = name in entry.derived
+            if not hit:
+                entry.derived[name] = compute(entry.df.copy(deep=False))
+            value = entry.derived[name]
+        self._count(name, hit)
+        return value
+
+    def peek(self, key, name, default=None):
+        """Returns the value derived from the dataset under key if it has been computed, else default."""
+        entry = self._entry(key)
+        with entry.lock:
+            return entry.derived.get(name, default)
+
+    def _count(self, name, hit):
+        with self._lock:
+            (self._hits if hit else self._misses)[name] += 1
+
+    def counters(self, name=None):
+        """Returns the hits and misses for the derived value name, or for dataset loads when name is None."""
+        with self._lock:
+            return {'hits': self._hits[name], 'misses': self._misses[name]}
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.df is None:
+            raise KeyError(f"Dataset {key!r} is not in the store.")
+        return entry
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refcount -= 1
+            if entry.refcount > 0:
+                return
+            if entry.df is None: # The load failed
+                del self._entries[key]
+                return
+            self._unreferenced[key] = None
+            while len(self._unreferenced) > self.retain:
+                evicted, _ = self._unreferenced.popitem(last=False)
+                del self._entries[evicted]
+
+    def clear(self):
+        """Evicts every dataset without outstanding handles."""
+        with self._lock:
+            for key in self._unreferenced:
+                del self._entries[key]
+            self._unreferenced.clear()
+
+    def stats(self):
+        """Returns the number of stored datasets, how many are referenced, their handle count, base-column
+        bytes and the hit/miss counts of dataset loads."""
+        with self._lock:
+            loaded = [entry for entry in self._entries.values() if entry.df is not None]
+            return {'datasets': len(loaded),
+                    'referenced': sum(entry.refcount > 0 for entry in loaded),
+                    'handles': sum(entry.refcount for entry in loaded),
+                    'bytes': sum(entry.nbytes for entry in loaded),
+                    'hits': self._hits[None],
+                    'misses': self._misses[None]}
+
+# The store shared by every session of this server process
+DATASET_STORE = DatasetStore()
+
+def session_dataset(session_state, name='dataset_handle'):
+    """Returns the live DatasetHandle held in a session-state mapping, or None."""
+    handle = session_state.get(name)
+    return None if handle is None or handle.released else handle
+
+def hold_dataset(session_state, handle, name='dataset_handle'):
+    """Stores handle in session state, releasing the handle it replaces."""
+    previous = session_state.get(name)
+    session_state[name] = handle
+    if previous is not None and previous is not handle:
+        previous.release()
+
+def drop_dataset(session_state, name='dataset_handle'):
+    """Releases and removes the session's handle, if any."""
+    handle = session_state.get(name)
+    if handle is not None:
+        del session_state[name]
+        handle.release()
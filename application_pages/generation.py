@@ -0,0 +1,150 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from application_pages.schema import (RISK_UNIT_TYPES, RISK_RATINGS, CONTROL_TYPES, COMPACT_DTYPES,
+                                      categorical_from_codes, is_categorical, to_compact)
+from application_pages.validation import validate_schema
+from application_pages.instrumentation import timed
+
+# Synthetic register generation, importable without Streamlit (batch jobs, workers, benchmarks).
+#
+# Seeded generation draws each block of units from its own np.random.Generator stream, so a
+# unit's values depend only on (seed, unit position) and never on chunk size or worker count.
+SEED_BLOCK_SIZE = 2 ** 16
+
+def _generate_seeded_block(seed, block_index):
+    """Draws every column for one SEED_BLOCK_SIZE block of units from its own spawned stream."""
+    # Equivalent to SeedSequence(seed).spawn(...)[block_index], without spawning the earlier children
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block_index,)))
+    size = SEED_BLOCK_SIZE
+    # Rating columns are drawn as int8 codes into their level lists and decoded by the caller.
+    # Assessment_Cycle is always drawn so the other columns don't depend on has_time_series.
+    return {
+        'Risk_Assessment_Unit_Type': rng.integers(0, len(RISK_UNIT_TYPES), size, dtype=np.int8),
+        'Inherent_Risk_Rating': rng.integers(0, len(RISK_RATINGS), size, dtype=np.int8),
+        'Control_Effectiveness_Rating': rng.integers(0, len(RISK_RATINGS), size, dtype=np.int8),
+        'Control_Type': rng.integers(0, len(CONTROL_TYPES), size, dtype=np.int8),
+        'Control_Key_Status': rng.integers(0, 2, size).astype(bool),
+        'Process_Complexity': rng.integers(1, 11, size),
+        'Operational_Metric_1': rng.normal(50, 10, size),
+        'Operational_Metric_2': rng.normal(100, 20, size),
+        'Assessment_Cycle': rng.integers(2020, 2024, size),
+    }
+
+# Level lists used to decode the code columns of a seeded block back into strings
+_CODED_COLUMN_LEVELS = {
+    'Risk_Assessment_Unit_Type': RISK_UNIT_TYPES,
+    'Inherent_Risk_Rating': RISK_RATINGS,
+    'Control_Effectiveness_Rating': RISK_RATINGS,
+    'Control_Type': CONTROL_TYPES,
+}
+
+def seeded_unit_columns(draw_block, start, stop):
+    """Returns the [start, stop) unit positions of per-block draws as one array per column.
+
+    draw_block(block_index) returns a dict of SEED_BLOCK_SIZE-long arrays for that block's units.
+    An empty range still draws the block holding start, so every column comes back, with zero length.
+    """
+    stop = max(start, stop)
+    first_block, last_block = start // SEED_BLOCK_SIZE, max(start, stop - 1) // SEED_BLOCK_SIZE
+    parts = []
+    for block_index in range(first_block, last_block + 1):
+        block = draw_block(block_index)
+        block_start = block_index * SEED_BLOCK_SIZE
+        lo, hi = max(start, block_start) - block_start, min(stop, block_start + SEED_BLOCK_SIZE) - block_start
+        parts.append({col: values[lo:hi] for col, values in block.items()})
+    return {col: np.concatenate([part[col] for part in parts]) for col in parts[0]}
+
+def generate_unit_range(start, stop, has_time_series, seed, compact=False):
+    """Generates the seeded synthetic rows for units [start, stop) (0-based positions)."""
+    data = {'Risk_Assessment_Unit_ID': np.arange(start + 1, stop + 1)}
+    data.update(seeded_unit_columns(lambda block_index: _generate_seeded_block(seed, block_index), start, stop))
+
+    for col, levels in _CODED_COLUMN_LEVELS.items():
+        if compact:
+            # The generator's levels are a prefix of each compact category list, so codes carry over
+            data[col] = categorical_from_codes(data[col], col)
+        else:
+            data[col] = np.array(levels)[data[col]]
+    df = pd.DataFrame(data)
+    if compact:
+        df = df.astype({col: COMPACT_DTYPES[col] for col in df.columns if not is_categorical(df[col])})
+
+    if not has_time_series:
+        df = df.drop(columns=['Assessment_Cycle'])
+    return df
+
+@timed('generate')
+def generate_synthetic_data(num_units, has_time_series, seed=None, compact=False):
+    """Generates a pandas.DataFrame with synthetic operational risk data.
+
+    With a seed the data is reproducible and identical to the rows written by
+    generate_synthetic_dataset for the same seed; without one the global np.random state is used.
+    compact=True returns the categorical/int8 schema from application_pages.schema.COMPACT_DTYPES.
+    """
+    if not isinstance(has_time_series, bool):
+        raise TypeError("has_time_series must be a boolean")
+
+    if seed is not None:
+        return generate_unit_range(0, num_units, has_time_series, seed, compact=compact)
+
+    data = {
+        'Risk_Assessment_Unit_ID': range(1, num_units + 1),
+        'Risk_Assessment_Unit_Type': np.random.choice(RISK_UNIT_TYPES, num_units),
+        'Inherent_Risk_Rating': np.random.choice(RISK_RATINGS, num_units),
+        'Control_Effectiveness_Rating': np.random.choice(RISK_RATINGS, num_units),
+        'Control_Type': np.random.choice(CONTROL_TYPES, num_units),
+        'Control_Key_Status': np.random.choice([True, False], num_units),
+        'Process_Complexity': np.random.randint(1, 11, num_units),
+        'Operational_Metric_1': np.random.normal(50, 10, num_units),
+        'Operational_Metric_2': np.random.normal(100, 20, num_units)
+    }
+    df = pd.DataFrame(data)
+
+    if has_time_series:
+        df['Assessment_Cycle'] = np.random.randint(2020, 2024, num_units)
+    return to_compact(df) if compact else df
+
+def _write_chunk_parquet(task):
+    """Process-pool worker: generates one unit range and writes it as a Parquet part file."""
+    path, start, stop, has_time_series, seed, compact = task
+    generate_unit_range(start, stop, has_time_series, seed, compact=compact).to_parquet(path, index=False)
+    return path
+
+def generate_synthetic_dataset(output_dir, num_units, has_time_series, seed, chunk_size=1_000_000, max_workers=None,
+                               compact=False):
+    """Streams seeded synthetic data to a partitioned Parquet dataset, one part file per chunk.
+
+    Chunks are generated in parallel in a process pool (max_workers=1 runs in-process), so only
+    about chunk_size * max_workers rows are held in memory at once. Read the result back with
+    pd.read_parquet(output_dir). compact=True writes rating columns as dictionary-encoded
+    categoricals. Returns the list of part file paths in unit order.
+    """
+    if not isinstance(has_time_series, bool):
+        raise TypeError("has_time_series must be a boolean")
+    if seed is None:
+        raise ValueError("generate_synthetic_dataset requires a seed.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [
+        (os.path.join(output_dir, f"part-{i:05d}.parquet"), start, min(start + chunk_size, num_units), has_time_series, seed, compact)
+        for i, start in enumerate(range(0, num_units, chunk_size))
+    ]
+
+    if max_workers == 1:
+        return [_write_chunk_parquet(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_write_chunk_parquet, tasks))
+
+def validate_data(df):
+    """Validates DataFrame for expected columns, data types, PK uniqueness, and missing values.
+
+    Raises the first problem found as KeyError/ValueError/TypeError; use
+    application_pages.validation.validate_schema for the full report.
+    """
+    validate_schema(df).raise_first()
@@ -0,0 +1,248 @@
+import csv
+import io
+import os
+from collections import namedtuple
+
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+
+from application_pages.schema import COMPACT_DTYPES
+from application_pages.validation import SchemaValidator, UNIT_SCHEMA
+from application_pages.instrumentation import timed
+
+# Bulk ingest of real risk registers. Files are read as Arrow record batches (memory-mapped for
+# Parquet and Arrow IPC files on disk, block-streamed for CSV), restricted to the schema columns,
+# coerced batch by batch straight into the compact schema and validated as they arrive. Rating
+# columns stay dictionary-encoded end to end, so no per-row Python strings are created: only the
+# compact columns (about 20 bytes per unit) are accumulated.
+
+DEFAULT_BATCH_ROWS = 2 ** 18 # Rows per coerced batch; bounds the Arrow buffers live at once
+# Arrow's streaming CSV reader reads a fixed number of blocks ahead of the consumer, so its memory
+# scales with the block size; blocks are regrouped into batch_size-row tables before coercion.
+CSV_BLOCK_BYTES = 2 ** 20
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'}
+
+IngestResult = namedtuple('IngestResult', ['df', 'report'])
+
+# Arrow types forced on CSV columns, so every block parses the same way and ratings arrive dictionary-encoded.
+# Integer columns are parsed as float64: exports write them as '2022.0' once the column has held a
+# NaN, and _coerce_numeric narrows whole-number floats back to the compact integer dtype.
+_CSV_TYPES = {
+    col: pa.dictionary(pa.int32(), pa.string()) if isinstance(dtype, pd.CategoricalDtype)
+    else pa.bool_() if dtype.kind == 'b' else pa.float64()
+    for col, dtype in COMPACT_DTYPES.items() if col in UNIT_SCHEMA
+}
+
+def register_format(name):
+    """Returns the ingest format ('csv', 'parquet' or 'arrow') for a file name, by extension."""
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported register format: {name}. Expected one of {sorted(FORMATS)}.")
+    return FORMATS[extension]
+
+def _arrow_source(source):
+    """A zero-copy Arrow input for a path (memory-mapped) or an in-memory upload (its buffer)."""
+    if isinstance(source, (str, os.PathLike)):
+        return pa.memory_map(os.fspath(source), 'r')
+    return pa.BufferReader(pa.py_buffer(source.getbuffer()))
+
+def _source_size(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    return source.getbuffer().nbytes
+
+class _CountingReader(io.RawIOBase):
+    """Wraps a binary file to count the bytes read from it, for CSV progress."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read(len(buffer))
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+def _csv_header(raw):
+    """Reads the header row of a binary CSV file object (the caller rewinds it)."""
+    return next(csv.reader([raw.readline().decode('utf-8-sig')]), [])
+
+def _parquet_batches(source, batch_size):
+    arrow_source = _arrow_source(source)
+    names = pq.read_schema(arrow_source).names
+    arrow_source.seek(0)
+    # Only columns present in the file: pyarrow raises KeyError for the others, and missing columns
+    # are for validation to report
+    parquet_file = pq.ParquetFile(arrow_source, read_dictionary=[col for col in names if col in _CSV_TYPES
+                                                                 and pa.types.is_dictionary(_CSV_TYPES[col])])
+    columns = [col for col in UNIT_SCHEMA if col in names]
+    total_rows = max(parquet_file.metadata.num_rows, 1)
+    rows = 0
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        rows += batch.num_rows
+        yield batch, rows / total_rows
+    if not rows: # No row groups: still hand the columns over so validation can check them
+        yield parquet_file.schema_arrow.empty_table().select(columns), 1.0
+
+def _arrow_batches(source, batch_size):
+    arrow_source = _arrow_source(source)
+    try:
+        reader = pa_ipc.open_file(arrow_source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        num_batches = max(reader.num_record_batches, 1)
+    except pa.ArrowInvalid: # Not the random-access file format: read it as an IPC stream
+        arrow_source.seek(0)
+        reader = pa_ipc.open_stream(arrow_source)
+        batches, num_batches = iter(reader), None
+    columns = [col for col in UNIT_SCHEMA if col in reader.schema.names]
+    size = _source_size(source)
+    rows = 0
+    for i, batch in enumerate(batches):
+        batch = batch.select(columns)
+        rows += batch.num_rows
+        fraction = (i + 1) / num_batches if num_batches else min(arrow_source.tell() / size, 1.0)
+        for start in range(0, batch.num_rows, batch_size):
+            yield batch.slice(start, batch_size), fraction
+    if not rows:
+        yield reader.schema.empty_table().select(columns), 1.0
+
+def _csv_batches(source, batch_size):
+    raw = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else io.BytesIO(source.getbuffer())
+    try:
+        header = _csv_header(raw)
+        raw.seek(0)
+        columns = [col for col in UNIT_SCHEMA if col in header]
+        counting = _CountingReader(raw)
+        size = max(_source_size(source), 1)
+        reader = pa_csv.open_csv(
+            counting,
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+            convert_options=pa_csv.ConvertOptions(include_columns=columns, strings_can_be_null=True,
+                                                  column_types={col: _CSV_TYPES[col] for col in columns}))
+        group, rows, total_rows = [], 0, 0
+        for batch in reader:
+            group.append(batch)
+            rows += batch.num_rows
+            total_rows += batch.num_rows
+            if rows >= batch_size:
+                yield pa.Table.from_batches(group), min(counting.bytes_read / size, 1.0)
+                group, rows = [], 0
+        if group and rows:
+            yield pa.Table.from_batches(group), 1.0
+        elif not total_rows: # Header only
+            yield reader.schema.empty_table(), 1.0
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Could not parse CSV register: {e}") from e
+    finally:
+        raw.close()
+
+_READERS = {'csv': _csv_batches, 'parquet': _parquet_batches, 'arrow': _arrow_batches}
+
+def _coerce_categorical(array, dtype):
+    """Dictionary or string array -> (int8 codes, CategoricalDtype) without materializing row strings.
+
+    Values outside the dtype's categories are appended as extra categories, so validation still
+    reports them by value rather than as nulls.
+    """
+    if not pa.types.is_dictionary(array.type):
+        array = pc.dictionary_encode(array)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    dictionary, indices = array.dictionary, array.indices
+    levels = dtype.categories
+    lookup = np.append(pc.index_in(dictionary, value_set=pa.array(list(levels))).fill_null(-1).to_numpy(), -1)
+    positions = indices.fill_null(len(dictionary)).to_numpy() # Null rows point at the trailing -1
+
+    used = np.bincount(positions, minlength=len(dictionary) + 1)[:-1] > 0
+    invalid = np.flatnonzero(used & (lookup[:-1] < 0) & dictionary.is_valid().to_numpy(zero_copy_only=False))
+    if len(invalid):
+        extra = [dictionary[int(i)].as_py() for i in invalid]
+        lookup[invalid] = np.arange(len(levels), len(levels) + len(invalid))
+        dtype = pd.CategoricalDtype(list(levels) + extra, ordered=True)
+    codes_dtype = np.int8 if len(dtype.categories) < 128 else np.int32
+    return lookup.astype(codes_dtype)[positions], dtype
+
+def _whole_numbers(values):
+    """True if every float in values is a whole number within the int64 range (NaN and inf are not)."""
+    return not len(values) or (np.array_equal(values, np.trunc(values))
+                               and values.min() >= -2.0 ** 63 and values.max() < 2.0 ** 63)
+
+def _coerce_numeric(array, dtype):
+    """Numeric array -> NumPy array in the compact dtype when the values fit, else the widest lossless one."""
+    if array.null_count or not (pa.types.is_integer(array.type) or pa.types.is_floating(array.type)
+                                or pa.types.is_boolean(array.type)):
+        return array.to_pandas() # Nulls or a wrong type: left for validation to report
+    values = array.to_numpy(zero_copy_only=False) # Zero-copy for numbers; booleans are bit-packed in Arrow
+    if dtype.kind == 'i' and values.dtype.kind == 'f' and _whole_numbers(values):
+        values = values.astype(np.int64)
+    if dtype.kind == 'i' and values.dtype.kind == 'i':
+        info = np.iinfo(dtype)
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            return values
+    elif dtype.kind == 'i' or (dtype.kind == 'b' and values.dtype.kind != 'b'):
+        return values # Fractional floats in an integer column, or numbers in the boolean one, stay as read
+    return values.astype(dtype, copy=False)
+
+def coerce_batch(batch):
+    """Converts one Arrow record batch (or table) to a dict of column -> NumPy array / pandas object in the compact schema."""
+    columns = {}
+    for name, array in zip(batch.schema.names, batch.columns):
+        dtype = COMPACT_DTYPES[name]
+        if isinstance(dtype, pd.CategoricalDtype) and (pa.types.is_dictionary(array.type) or pa.types.is_string(array.type)
+                                                       or pa.types.is_large_string(array.type)):
+            codes, batch_dtype = _coerce_categorical(array, dtype)
+            columns[name] = pd.Categorical.from_codes(codes, dtype=batch_dtype)
+        elif isinstance(dtype, pd.CategoricalDtype):
+            columns[name] = array.to_pandas() # Not text: left for validation to report
+        else:
+            columns[name] = _coerce_numeric(array, dtype)
+    return columns
+
+@timed('ingest')
+def ingest_register(source, format=None, batch_size=DEFAULT_BATCH_ROWS, progress=None):
+    """Reads, coerces and validates a CSV, Parquet or Arrow IPC risk register, batch by batch.
+
+    source is a file path or an in-memory upload (anything with getbuffer() and a name). Only the
+    schema columns are read; a file without rows still has its columns validated. progress, if given, is called with (rows read, fraction done) after
+    every batch. Returns IngestResult(df, report); df is the register in the compact schema, or
+    None if validation failed (reading continues after the first problem so the report is complete).
+    """
+    format = format or register_format(source if isinstance(source, (str, os.PathLike)) else source.name)
+    if format not in _READERS:
+        raise ValueError(f"Unsupported register format: {format}. Expected one of {sorted(_READERS)}.")
+
+    validator = SchemaValidator()
+    parts, keep = {}, True
+    for batch, fraction in _READERS[format](source, batch_size):
+        columns = coerce_batch(batch)
+        validator.update(pd.DataFrame(columns, copy=False))
+        keep = keep and validator.report().ok
+        if keep:
+            for name, values in columns.items():
+                parts.setdefault(name, []).append(values)
+        else:
+            parts.clear() # Invalid register: stop accumulating, keep validating for the full report
+        if progress:
+            progress(validator.num_rows, fraction)
+
+    report = validator.report()
+    if not report.ok:
+        return IngestResult(None, report)
+
+    data = {}
+    for name in [col for col in UNIT_SCHEMA if col in parts]:
+        # One column at a time, dropping its batches as soon as they are joined, so the peak stays
+        # close to the size of the finished frame
+        values = parts.pop(name)
+        data[name] = pd.concat([pd.Series(part, copy=False) for part in values], ignore_index=True) if len(values) != 1 \
+            else pd.Series(values[0], copy=False)
+    return IngestResult(pd.DataFrame(data, copy=False), report)
@@ -0,0 +1,161 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Per-stage timing and memory-delta hooks. Disabled by default: a disabled `stage` returns a shared
+# no-op context manager and a disabled `timed` function makes one flag check before calling
+# through, so the hooks can stay in the hot paths. Samples are process-wide (all sessions and
+# threads record into the same registry) and each stage keeps a rolling window for percentiles.
+
+ROLLING_WINDOW = 256 # Samples per stage kept for the latency percentiles
+QUANTILES = (0.5, 0.9, 0.99)
+METRIC_PREFIX = 'qulab_stage'
+
+_enabled = os.environ.get('QULAB_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+_lock = threading.Lock()
+_stages = {}
+
+class StageStats:
+    """Rolling window of (seconds, RSS delta) samples for one stage, plus cumulative totals."""
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.durations = deque(maxlen=window)
+        self.rss_deltas = deque(maxlen=window)
+        self.count = 0
+        self.total_seconds = 0.0
+
+    def add(self, seconds, rss_delta):
+        self.durations.append(seconds)
+        if rss_delta is not None:
+            self.rss_deltas.append(rss_delta)
+        self.count += 1
+        self.total_seconds += seconds
+
+    def summary(self):
+        durations = np.fromiter(self.durations, dtype=float)
+        summary = {'count': self.count, 'total_seconds': self.total_seconds, 'last_seconds': float(durations[-1])}
+        summary.update({f'p{round(q * 100)}_seconds': float(value)
+                        for q, value in zip(QUANTILES, np.quantile(durations, QUANTILES))})
+        summary['last_rss_delta_bytes'] = self.rss_deltas[-1] if self.rss_deltas else None
+        summary['max_rss_delta_bytes'] = max(self.rss_deltas) if self.rss_deltas else None
+        return summary
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def current_rss_bytes():
+    """Returns the process's current resident set size in bytes, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError: # macOS, Windows: stages are timed only
+        return None
+
+def set_enabled(enabled):
+    """Turns recording on or off for the whole process."""
+    global _enabled
+    _enabled = bool(enabled)
+
+def is_enabled():
+    return _enabled
+
+def record(name, seconds, rss_delta=None):
+    """Adds one sample to a stage's rolling window."""
+    with _lock:
+        if name not in _stages:
+            _stages[name] = StageStats()
+        _stages[name].add(seconds, rss_delta)
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    __slots__ = ('name', 'start', 'rss_start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.rss_start = current_rss_bytes()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        rss_end = current_rss_bytes()
+        record(self.name, seconds, None if rss_end is None else rss_end - self.rss_start)
+        return False
+
+def stage(name):
+    """Context manager that records the wall time and RSS change of its block under name.
+
+    RSS is process-wide, so with concurrent sessions the delta is indicative only.
+    """
+    return _Stage(name) if _enabled else _NULL_STAGE
+
+def timed(name):
+    """Decorator form of stage: records every call of the function under name."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """Returns {stage: summary dict} for every stage recorded so far, sorted by name."""
+    with _lock:
+        return {name: _stages[name].summary() for name in sorted(_stages)}
+
+def reset():
+    """Drops all recorded samples."""
+    with _lock:
+        _stages.clear()
+
+def prometheus_text(stats=None):
+    """Renders a snapshot in the Prometheus text exposition format (a summary per stage, plus RSS gauges)."""
+    stats = snapshot() if stats is None else stats
+    lines = [f'# HELP {METRIC_PREFIX}_duration_seconds Wall time per pipeline stage (rolling quantiles over the last {ROLLING_WINDOW} runs).',
+             f'# TYPE {METRIC_PREFIX}_duration_seconds summary']
+    for name, summary in stats.items():
+        for q in QUANTILES:
+            lines.append(f'{METRIC_PREFIX}_duration_seconds{{stage="{name}",quantile="{q}"}} {summary[f"p{round(q * 100)}_seconds"]:.9g}')
+        lines.append(f'{METRIC_PREFIX}_duration_seconds_sum{{stage="{name}"}} {summary["total_seconds"]:.9g}')
+        lines.append(f'{METRIC_PREFIX}_duration_seconds_count{{stage="{name}"}} {summary["count"]}')
+
+    lines += [f'# HELP {METRIC_PREFIX}_rss_delta_bytes Change in process RSS across the last run of each stage.',
+              f'# TYPE {METRIC_PREFIX}_rss_delta_bytes gauge']
+    lines += [f'{METRIC_PREFIX}_rss_delta_bytes{{stage="{name}"}} {summary["last_rss_delta_bytes"]}'
+              for name, summary in stats.items() if summary['last_rss_delta_bytes'] is not None]
+    return '\n'.join(lines) + '\n'
+
+def json_record(stats=None):
+    """Renders a snapshot as one JSON line with a Unix timestamp."""
+    stats = snapshot() if stats is None else stats
+    return json.dumps({'timestamp': time.time(), 'stages': stats}) + '\n'
+
+def export_metrics(path):
+    """Writes the current snapshot to path: appends a JSON line to a .json/.jsonl log, otherwise
+    atomically replaces path with the Prometheus text (e.g. for the node_exporter textfile collector)."""
+    stats = snapshot()
+    if path.endswith(('.json', '.jsonl')):
+        with open(path, 'a') as f:
+            f.write(json_record(stats))
+        return
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(prometheus_text(stats))
+    os.replace(tmp_path, path)
@@ -0,0 +1,181 @@
+from collections import namedtuple
+
+import pandas as pd
+import numpy as np
+
+from application_pages.schema import (INHERENT_RISK_LEVELS, CONTROL_EFFECTIVENESS_LEVELS, RESIDUAL_RISK_LEVELS,
+                                      categorical_from_codes, encode_ratings, is_compact)
+from application_pages.instrumentation import timed
+
+# Registry of residual risk calculation methods. A method is a vectorized kernel that turns the
+# shared inputs into a residual score, plus ascending thresholds that bin the score into
+# RESIDUAL_RISK_LEVELS: score <= thresholds[0] is 'Low', score <= thresholds[1] is 'Medium', else 'High'.
+#
+# The kernel receives a dict of NumPy arrays: 'inherent_score' (1-4), 'control_score' (1-3) and
+# any extra DataFrame columns the method lists in `columns`. Methods without extra columns only
+# depend on the 4x3 inherent x control grid, so they are evaluated once into a lookup table and
+# applied with a single gather.
+ResidualMethod = namedtuple('ResidualMethod', ['name', 'kernel', 'thresholds', 'columns', 'description'])
+
+RESIDUAL_METHODS = {}
+_LOOKUP_TABLES = {}
+
+def register_method(name, kernel, thresholds, columns=(), description=''):
+    """Registers (or replaces) a residual risk method and returns it.
+
+    Example, a complexity-adjusted variant of Basic:
+
+        register_method('Complexity-Adjusted',
+                        lambda x: x['inherent_score'] - x['control_score'] + (x['Process_Complexity'] >= 8),
+                        thresholds=[0, 1], columns=['Process_Complexity'])
+    """
+    thresholds = np.asarray(thresholds)
+    if thresholds.shape != (len(RESIDUAL_RISK_LEVELS) - 1,) or (np.diff(thresholds) < 0).any():
+        raise ValueError(f"thresholds must be {len(RESIDUAL_RISK_LEVELS) - 1} ascending cut points.")
+
+    method = ResidualMethod(name, kernel, thresholds, tuple(columns), description)
+    RESIDUAL_METHODS[name] = method
+    _LOOKUP_TABLES.pop(name, None)
+    if not method.columns:
+        _LOOKUP_TABLES[name] = _build_lookup_tables(method)
+    return method
+
+def method_names():
+    """Returns the registered method names in registration order."""
+    return list(RESIDUAL_METHODS)
+
+def grid_method_names():
+    """Returns the methods that depend only on the inherent x control grid (and so have lookup tables)."""
+    return [name for name, method in RESIDUAL_METHODS.items() if not method.columns]
+
+def applicable_methods(df):
+    """Returns the registered methods whose extra input columns are all present in df."""
+    return [name for name, method in RESIDUAL_METHODS.items() if all(col in df.columns for col in method.columns)]
+
+def check_method(calculation_method):
+    """Raises ValueError if calculation_method is not registered."""
+    if calculation_method not in RESIDUAL_METHODS:
+        choices = ' or '.join(repr(name) for name in RESIDUAL_METHODS)
+        raise ValueError(f"Invalid calculation_method. Choose {choices}.")
+
+def rate_scores(scores, thresholds):
+    """Bins residual scores into int8 codes into RESIDUAL_RISK_LEVELS (right-closed bins)."""
+    return np.searchsorted(thresholds, scores, side='left').astype(np.int8)
+
+def _build_lookup_tables(method):
+    """Evaluates a grid-only method over every inherent x control cell: (score table, rating-code table)."""
+    inherent_scores = np.repeat(np.arange(1, len(INHERENT_RISK_LEVELS) + 1), len(CONTROL_EFFECTIVENESS_LEVELS))
+    control_scores = np.tile(np.arange(1, len(CONTROL_EFFECTIVENESS_LEVELS) + 1), len(INHERENT_RISK_LEVELS))
+    score_table = np.asarray(method.kernel({'inherent_score': inherent_scores, 'control_score': control_scores}))
+    return score_table, rate_scores(score_table, method.thresholds)
+
+def lookup_tables(calculation_method):
+    """Returns the flattened (score table, rating-code table) of a grid-only method, indexed by
+    inherent_code * len(CONTROL_EFFECTIVENESS_LEVELS) + control_code."""
+    check_method(calculation_method)
+    if calculation_method not in _LOOKUP_TABLES:
+        raise ValueError(f"Method {calculation_method!r} uses per-unit columns and has no inherent x control lookup table.")
+    return _LOOKUP_TABLES[calculation_method]
+
+def encode_risk_inputs(df):
+    """Encodes the two rating columns into integer codes, raising ValueError on invalid ratings."""
+    # Inherent_Risk_Rating has four levels (scores 1-4); Control_Effectiveness_Rating is 'Low', 'Medium',
+    # 'High' (scores 1-3).
+    inherent_codes = encode_ratings(df['Inherent_Risk_Rating'], INHERENT_RISK_LEVELS)
+    if (inherent_codes < 0).any():
+        invalid_ratings = df['Inherent_Risk_Rating'][inherent_codes < 0].unique()
+        raise ValueError(f"Invalid Inherent_Risk_Rating values: {invalid_ratings}. Allowed values are: {INHERENT_RISK_LEVELS}")
+
+    control_codes = encode_ratings(df['Control_Effectiveness_Rating'], CONTROL_EFFECTIVENESS_LEVELS)
+    if (control_codes < 0).any():
+        invalid_ratings = df['Control_Effectiveness_Rating'][control_codes < 0].unique()
+        raise ValueError(f"Invalid Control_Effectiveness_Rating values: {invalid_ratings}. Allowed values are: {CONTROL_EFFECTIVENESS_LEVELS}")
+    return inherent_codes, control_codes
+
+def _score_dtype(scores):
+    """Narrow dtype for a compact-schema score column."""
+    if scores.dtype.kind in 'iub' and (scores.size == 0 or (scores.min() >= -128 and scores.max() <= 127)):
+        return np.int8
+    return np.float32 if scores.dtype.kind == 'f' else np.int32
+
+@timed('calculate')
+def compute_residuals(df, methods=None):
+    """Computes Residual_Risk_Score and Residual_Risk_Rating for several methods in one pass.
+
+    The rating columns are encoded once and shared by every method. Returns {method: DataFrame with
+    the two residual columns, indexed like df}, ready to attach with attach_residuals. The columns
+    use the compact dtypes when df does.
+    """
+    methods = method_names() if methods is None else list(methods)
+    for name in methods:
+        check_method(name)
+
+    inherent_codes, control_codes = encode_risk_inputs(df)
+    cell = inherent_codes * len(CONTROL_EFFECTIVENESS_LEVELS) + control_codes
+    compact = is_compact(df)
+
+    unit_inputs = None
+    residuals = {}
+    for name in methods:
+        method = RESIDUAL_METHODS[name]
+        if not method.columns:
+            score_table, rating_table = _LOOKUP_TABLES[name]
+            scores, rating_codes = score_table[cell], rating_table[cell] # Single gather per method
+        else:
+            if unit_inputs is None:
+                unit_inputs = {'inherent_score': inherent_codes + 1, 'control_score': control_codes + 1}
+            missing = [col for col in method.columns if col not in df.columns]
+            if missing:
+                raise ValueError(f"Method {name!r} needs column(s) {missing}, which are not in the data.")
+            inputs = dict(unit_inputs, **{col: df[col].to_numpy() for col in method.columns})
+            scores = np.asarray(method.kernel(inputs))
+            rating_codes = rate_scores(scores, method.thresholds)
+
+        if compact:
+            # Compact schema in, compact schema out: narrow score and categorical rating
+            residuals[name] = pd.DataFrame({
+                'Residual_Risk_Score': scores.astype(_score_dtype(scores)),
+                'Residual_Risk_Rating': categorical_from_codes(rating_codes, 'Residual_Risk_Rating'),
+            }, index=df.index)
+        else:
+            residuals[name] = pd.DataFrame({
+                'Residual_Risk_Score': scores,
+                'Residual_Risk_Rating': np.array(RESIDUAL_RISK_LEVELS, dtype=object)[rating_codes],
+            }, index=df.index)
+    return residuals
+
+@timed('attach_residuals')
+def attach_residuals(df, residual_columns):
+    """Returns a copy of df with one method's residual columns (from compute_residuals) appended."""
+    # A shallow copy is enough: only new columns are set on it, so df itself is never modified.
+    # Assigning the Series (not its values) lets copy-on-write share the residual buffers as well,
+    # so neither the base nor the residual columns are copied.
+    df_copy = df.copy(deep=False)
+    for col in residual_columns.columns:
+        df_copy[col] = residual_columns[col]
+    return df_copy
+
+def calculate_residual_risk(df, calculation_method):
+    """Calculates the residual risk rating based on the specified calculation method."""
+    check_method(calculation_method)
+    residuals = compute_residuals(df, [calculation_method])
+    return attach_residuals(df, residuals[calculation_method])
+
+def calculate_all_residual_risks(df):
+    """Computes the residual columns of every registered method that applies to df, in one pass."""
+    return compute_residuals(df, applicable_methods(df))
+
+def _basic_kernel(inputs):
+    # Inherent_Risk_Score - Control_Effectiveness_Score: -2 (Low Inherent, High Control) to 3 (Very High, Low)
+    return inputs['inherent_score'] - inputs['control_score']
+
+def _weighted_kernel(inputs):
+    # Inherent_Risk_Score / Control_Effectiveness_Score: 0.33 (Low Inherent, High Control) to 4.0 (Very High, Low)
+    return inputs['inherent_score'] / inputs['control_score']
+
+# Basic: <= 0 Low (e.g. 1-3, 3-3), 1 Medium (e.g. 2-1, 3-2), >= 2 High (e.g. 3-1, 4-2)
+register_method('Basic', _basic_kernel, thresholds=[0, 1],
+                description='Additive: Inherent Risk - Control Effectiveness')
+# Weighted: <= 1.0 Low (e.g. 1/3, 2/2), <= 2.0 Medium (e.g. 2/1, 4/2), > 2.0 High (e.g. 3/1, 4/1)
+register_method('Weighted', _weighted_kernel, thresholds=[1.0, 2.0],
+                description='Multiplicative: Inherent Risk / Control Effectiveness')
@@ -0,0 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from application_pages.schema import INHERENT_RISK_LEVELS, CONTROL_EFFECTIVENESS_LEVELS, RESIDUAL_RISK_LEVELS, RISK_RATINGS
+from application_pages.methods import lookup_tables
+from application_pages.instrumentation import timed
+
+# Monte Carlo over the residual risk model: each batch of portfolios is a (scenario x unit) int8
+# array of rating codes, mapped through the registered methods' inherent x control lookup tables
+# in one gather. Only per-scenario summaries leave a batch. Every block of SCENARIO_SEED_BLOCK
+# scenarios draws from its own seed stream and batches are made of whole blocks, so the scenarios
+# for a seed do not depend on the batch size or the number of workers.
+
+# Upper bound on scenario x unit cells per batch (a few int8/float arrays of this size are live at once),
+# unless a single seed block of scenarios is larger
+MAX_BATCH_CELLS = 2 ** 22
+SCENARIO_SEED_BLOCK = 64
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+def _default_probabilities(levels):
+    """Uniform over the levels the synthetic generator draws (RISK_RATINGS), zero for the rest."""
+    return np.array([1.0 if level in RISK_RATINGS else 0.0 for level in levels]) / len(RISK_RATINGS)
+
+def _draw_codes(rng, probabilities, shape):
+    """Draws int8 rating codes with the given level probabilities."""
+    num_levels = np.count_nonzero(probabilities)
+    if (probabilities[:num_levels] == probabilities[0]).all() and probabilities[0] > 0:
+        # Uniform over a prefix of the levels (the default): plain bounded integers are cheaper
+        return rng.integers(0, num_levels, shape, dtype=np.int8)
+    cdf = np.cumsum(probabilities)
+    cdf /= cdf[-1] # Exactly 1.0 at the end, so searchsorted never runs past the last level
+    return np.searchsorted(cdf, rng.random(shape), side='right').astype(np.int8)
+
+def simulate_batch(task):
+    """Simulates one batch of portfolios; returns per-scenario level shares and mean residual score.
+
+    Runs in a worker process when simulate_portfolios uses a pool, so it takes a single tuple.
+    """
+    entropy, start, num_scenarios, num_units, calculation_method, inherent_p, control_p = task
+    score_table, rating_table = lookup_tables(calculation_method)
+
+    cell = np.empty((num_scenarios, num_units), dtype=np.int8)
+    for offset in range(0, num_scenarios, SCENARIO_SEED_BLOCK): # start is a multiple of SCENARIO_SEED_BLOCK
+        block = cell[offset:offset + SCENARIO_SEED_BLOCK]
+        rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=((start + offset) // SCENARIO_SEED_BLOCK,)))
+        block[:] = _draw_codes(rng, inherent_p, block.shape) * len(CONTROL_EFFECTIVENESS_LEVELS)
+        block += _draw_codes(rng, control_p, block.shape)
+
+    ratings = rating_table[cell]
+    shares = np.stack([np.count_nonzero(ratings == code, axis=1) for code in range(len(RESIDUAL_RISK_LEVELS))], axis=1) / num_units
+    mean_score = score_table[cell].mean(axis=1)
+    return shares, mean_score
+
+@timed('simulate')
+def simulate_portfolios(num_scenarios, num_units, calculation_method='Basic', seed=None,
+                        inherent_probabilities=None, control_probabilities=None, max_workers=1):
+    """Simulates num_scenarios independent portfolios of num_units units and scores each one.
+
+    Ratings are drawn per unit with the given probabilities over INHERENT_RISK_LEVELS and
+    CONTROL_EFFECTIVENESS_LEVELS (default: uniform Low/Medium/High, like generate_synthetic_data).
+    Scenarios are processed in batches of at most MAX_BATCH_CELLS cells, optionally across a
+    process pool; results for a given seed depend on neither the batch size nor max_workers.
+
+    Returns a DataFrame with one row per scenario: Share_Low, Share_Medium, Share_High and
+    Mean_Residual_Score.
+    """
+    lookup_tables(calculation_method) # Raises ValueError for unknown or per-unit-column methods
+    if num_scenarios < 1 or num_units < 1:
+        raise ValueError("num_scenarios and num_units must be positive integers.")
+
+    inherent_p = _check_probabilities(inherent_probabilities, INHERENT_RISK_LEVELS, 'inherent_probabilities')
+    control_p = _check_probabilities(control_probabilities, CONTROL_EFFECTIVENESS_LEVELS, 'control_probabilities')
+
+    entropy = np.random.SeedSequence(seed).entropy # Fixed once so every seed block derives from the same root
+    batch_size = max(1, MAX_BATCH_CELLS // (num_units * SCENARIO_SEED_BLOCK)) * SCENARIO_SEED_BLOCK
+    tasks = [(entropy, start, min(batch_size, num_scenarios - start), num_units, calculation_method, inherent_p, control_p)
+             for start in range(0, num_scenarios, batch_size)]
+
+    if max_workers == 1:
+        results = [simulate_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(simulate_batch, tasks))
+
+    shares = np.concatenate([batch_shares for batch_shares, _ in results])
+    scenarios = pd.DataFrame(shares, columns=[f'Share_{level}' for level in RESIDUAL_RISK_LEVELS])
+    scenarios['Mean_Residual_Score'] = np.concatenate([mean_score for _, mean_score in results])
+    scenarios.index.name = 'Scenario'
+    return scenarios
+
+def _check_probabilities(probabilities, levels, name):
+    if probabilities is None:
+        return _default_probabilities(levels)
+    probabilities = np.asarray(probabilities, dtype=float)
+    if probabilities.shape != (len(levels),) or (probabilities < 0).any() or not np.isclose(probabilities.sum(), 1.0):
+        raise ValueError(f"{name} must be {len(levels)} non-negative probabilities summing to 1, one per level in {levels}.")
+    return probabilities
+
+def summarize_scenarios(scenarios, high_share_threshold=0.3, quantiles=DEFAULT_QUANTILES):
+    """Returns (quantile table of the per-scenario statistics, P(Share_High > high_share_threshold))."""
+    return scenarios.quantile(list(quantiles)), float((scenarios['Share_High'] > high_share_threshold).mean())
+
+def share_histogram(scenarios, column='Share_High', bins=40):
+    """Bins a per-scenario share column into a small frame of (bin_start, bin_end, scenario_count) for charting."""
+    counts, edges = np.histogram(scenarios[column], bins=bins, range=(0.0, 1.0))
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'scenario_count': counts})
@@ -1,103 +1,121 @@
+import hashlib
+import os
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-
-def generate_synthetic_data(num_units, has_time_series):
-    """Generates a pandas.DataFrame with synthetic operational risk data."""
-    if not isinstance(has_time_series, bool):
-        raise TypeError("has_time_series must be a boolean")
-
-    risk_unit_types = ['Business Unit', 'Department', 'Team']
-    risk_ratings = ['Low', 'Medium', 'High']
-    control_types = ['Preventative', 'Detective', 'Corrective']
-
-    data = {
-        'Risk_Assessment_Unit_ID': range(1, num_units + 1),
-        'Risk_Assessment_Unit_Type': np.random.choice(risk_unit_types, num_units),
-        'Inherent_Risk_Rating': np.random.choice(risk_ratings, num_units),
-        'Control_Effectiveness_Rating': np.random.choice(['Low', 'Medium', 'High'], num_units),
-        'Control_Type': np.random.choice(control_types, num_units),
-        'Control_Key_Status': np.random.choice([True, False], num_units),
-        'Process_Complexity': np.random.randint(1, 11, num_units),
-        'Operational_Metric_1': np.random.normal(50, 10, num_units),
-        'Operational_Metric_2': np.random.normal(100, 20, num_units)
-    }
-    df = pd.DataFrame(data)
-
-    if has_time_series:
-        df['Assessment_Cycle'] = np.random.randint(2020, 2024, num_units)
-    return df
-
-def validate_data(df):
-    """Validates DataFrame for expected columns, data types, PK uniqueness, and missing values."""
-    expected_columns = ['Risk_Assessment_Unit_ID', 'Risk_Assessment_Unit_Type', 'Inherent_Risk_Rating',
-                        'Control_Effectiveness_Rating', 'Control_Type', 'Control_Key_Status',
-                        'Process_Complexity', 'Operational_Metric_1', 'Operational_Metric_2']
-
-    for col in expected_columns:
-        if col not in df.columns:
-            raise KeyError(f"Missing column: {col}")
-
-    if df['Risk_Assessment_Unit_ID'].duplicated().any():
-        raise ValueError("Duplicate Risk_Assessment_Unit_ID values found.")
-
-    if df.isnull().any().any():
-        raise ValueError("Missing values found in DataFrame.")
-
-    if not pd.api.types.is_numeric_dtype(df['Risk_Assessment_Unit_ID']):
-        raise TypeError("Risk_Assessment_Unit_ID should be numeric.")
-    if not pd.api.types.is_string_dtype(df['Risk_Assessment_Unit_Type']):
-        raise TypeError("Risk_Assessment_Unit_Type should be string.")
-    if not pd.api.types.is_string_dtype(df['Inherent_Risk_Rating']):
-        raise TypeError("Inherent_Risk_Rating should be string.")
-    if not pd.api.types.is_string_dtype(df['Control_Effectiveness_Rating']):
-        raise TypeError("Control_Effectiveness_Rating should be string.")
-    if not pd.api.types.is_string_dtype(df['Control_Type']):
-        raise TypeError("Control_Type should be string.")
-    if not pd.api.types.is_bool_dtype(df['Control_Key_Status']):
-        raise TypeError("Control_Key_Status should be boolean.")
-    if not pd.api.types.is_numeric_dtype(df['Process_Complexity']):
-        raise TypeError("Process_Complexity should be numeric.")
-    if not pd.api.types.is_numeric_dtype(df['Operational_Metric_1']):
-        raise TypeError("Operational_Metric_1 should be numeric.")
-    if not pd.api.types.is_numeric_dtype(df['Operational_Metric_2']):
-        raise TypeError("Operational_Metric_2 should be numeric.")
 
-def run_page1():
-    st.header("Data Generation and Validation")
-    num_units = st.slider("Number of Risk Units", 10, 500, 100)
+# Generation and validation live in Streamlit-free modules; the names are re-exported for existing imports
+from application_pages.generation import generate_synthetic_data, validate_data
+from application_pages.datastore import DATASET_STORE, drop_dataset, hold_dataset, session_dataset
+from application_pages.pipeline import validation_stage
+from application_pages.resizing import resize_dataset
+
+# Upper bound of the unit-count slider; moving it resizes the register by delta, so large registers stay responsive
+MAX_GENERATED_UNITS = int(os.environ.get('QULAB_MAX_UNITS', 1_000_000))
+
+def _clear_generated_data():
+    """Releases the session's dataset handle and removes its companions from session state."""
+    drop_dataset(st.session_state)
+    if 'has_time_series' in st.session_state:
+        del st.session_state['has_time_series']
+
+def _format_bytes(num_bytes):
+    return f"{num_bytes / 2 ** 20:.1f} MiB" if num_bytes >= 2 ** 20 else f"{num_bytes / 2 ** 10:.1f} KiB"
+
+def _show_validated(handle, validation_report, has_time_series, title):
+    """Previews the dataset and keeps the handle in session state if it passed validation."""
+    st.subheader(title)
+    st.dataframe(handle.df.head())
+
+    if validation_report.ok:
+        st.success("Data validation successful!")
+        hold_dataset(st.session_state, handle) # The session keeps a handle, not a copy of the frame
+        st.session_state['has_time_series'] = has_time_series # Store this as well for page3
+    else:
+        st.error("Data validation failed:\n" + "\n".join(f"- {message}" for message in validation_report.messages()))
+        handle.release()
+        _clear_generated_data() # Clear invalid data
+
+def _generated_dataset():
+    num_units = st.slider("Number of Risk Units", 10, MAX_GENERATED_UNITS, 100)
     has_time_series = st.checkbox("Include Time Series Data", True)
+    compact = st.checkbox("Use Compact Schema (categorical ratings, narrow numerics)", False)
+    seed = int(st.number_input("Random Seed", min_value=0, value=42, step=1))
+
+    # Seeded generation is deterministic, so the parameters identify the data in the shared store
+    generation_key = ('generated', num_units, has_time_series, seed, compact)
 
     try:
-        synthetic_df = generate_synthetic_data(num_units, has_time_series)
-        st.subheader("Generated Synthetic Data")
-        st.dataframe(synthetic_df.head())
-        
-        # Capture info output
-        from io import StringIO
-        buffer = StringIO()
-        synthetic_df.info(buf=buffer)
-        s = buffer.getvalue()
-        # st.text("DataFrame Info:")
-        # st.text(s)
-
-        try:
-            validate_data(synthetic_df.copy())
-            st.success("Data validation successful!")
-            st.session_state['synthetic_df'] = synthetic_df.copy() # Store in session state
-            st.session_state['has_time_series'] = has_time_series # Store this as well for page3
-        except (KeyError, ValueError, TypeError) as e:
-            st.error(f"Data validation failed: {e}")
-            if 'synthetic_df' in st.session_state:
-                del st.session_state['synthetic_df'] # Clear invalid data
-            if 'has_time_series' in st.session_state:
-                del st.session_state['has_time_series']
+        handle = session_dataset(st.session_state)
+        if handle is not None and handle.key[0] == 'generated' and handle.key[2:] == generation_key[2:] \
+                and handle.key != generation_key:
+            # Only the unit count moved: grow or slice the session's register and its derived values
+            handle = resize_dataset(DATASET_STORE, handle, generation_key, num_units, has_time_series, seed, compact)
+        elif handle is None or handle.key != generation_key:
+            handle = DATASET_STORE.acquire(
+                generation_key, lambda: generate_synthetic_data(num_units, has_time_series, seed=seed, compact=compact))
+        _show_validated(handle, handle.derived('validation', validation_stage), has_time_series, "Generated Synthetic Data")
 
     except TypeError as e:
         st.error(f"Error generating data: {e}")
-        if 'synthetic_df' in st.session_state:
-            del st.session_state['synthetic_df']
-        if 'has_time_series' in st.session_state:
-            del st.session_state['has_time_series']
+        _clear_generated_data()
+
+def _ingest_upload(upload):
+    """Ingests an uploaded register into the compact schema with a progress bar; raises ValueError if it is invalid."""
+    from application_pages.ingest import ingest_register # pyarrow's readers load only when a register is uploaded
+    progress_bar = st.progress(0.0, text=f"Reading {upload.name}")
+    result = ingest_register(upload, progress=lambda rows, fraction: progress_bar.progress(
+        fraction, text=f"Reading {upload.name}: {rows:,} rows"))
+    progress_bar.empty()
+    if result.df is None:
+        raise ValueError("Data validation failed:\n" + "\n".join(f"- {message}" for message in result.report.messages()))
+    return result
+
+def _upload_digest(upload):
+    """Content hash of the upload, computed once per uploaded file rather than on every rerun."""
+    file_id, digest = st.session_state.get('upload_digest', (None, None))
+    if file_id != upload.file_id:
+        digest = hashlib.sha1(upload.getbuffer()).hexdigest()
+        st.session_state['upload_digest'] = (upload.file_id, digest)
+    return digest
+
+def _uploaded_dataset():
+    from application_pages.ingest import FORMATS
+    upload = st.file_uploader("Risk Register (CSV, Parquet or Arrow IPC)", type=[ext.lstrip('.') for ext in FORMATS],
+                              help="Columns follow the generated data; extra columns are ignored.")
+    if upload is None:
+        st.info("Upload a risk register to analyse it on the other pages.")
+        return
+
+    # The content hash identifies the upload, so every session uploading the same file shares one copy
+    upload_key = ('uploaded', upload.name, _upload_digest(upload))
+    ingested = {}
+
+    def load():
+        ingested['result'] = _ingest_upload(upload)
+        return ingested['result'].df
+
+    try:
+        handle = session_dataset(st.session_state)
+        if handle is None or handle.key != upload_key:
+            handle = DATASET_STORE.acquire(upload_key, load)
+        # Ingest validated the register as it read it; reuse that report rather than validating again
+        validation_report = handle.derived(
+            'validation', lambda df: ingested['result'].report if ingested else validation_stage(df))
+        _show_validated(handle, validation_report, 'Assessment_Cycle' in handle.df.columns, f"Uploaded Register: {upload.name}")
+        st.caption(f"{validation_report.num_rows:,} units ingested into the compact schema")
+
+    except ValueError as e:
+        st.error(str(e))
+        _clear_generated_data()
+
+def run_page1():
+    st.header("Data Generation and Validation")
+    source = st.radio("Data Source", ("Generate Synthetic Data", "Upload Risk Register"), horizontal=True)
+    if source == "Generate Synthetic Data":
+        _generated_dataset()
+    else:
+        _uploaded_dataset()
 
+    stats = DATASET_STORE.stats()
+    st.caption(f"Shared dataset store: {stats['datasets']} datasets ({_format_bytes(stats['bytes'])}), "
+               f"{stats['handles']} session handles; {stats['hits']} hits, {stats['misses']} misses")
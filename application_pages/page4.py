@@ -0,0 +1,48 @@
+import os
+
+import streamlit as st
+
+from application_pages.caching import session_cache
+from application_pages.methods import grid_method_names
+from application_pages.monte_carlo import simulate_portfolios, summarize_scenarios
+from application_pages.charts import plot_high_share_distribution_altair
+from application_pages.instrumentation import stage
+
+# Bounded per-session cache of simulation results, keyed on every simulation parameter
+SIMULATION_CACHE_SIZE = 4
+
+def run_page4():
+    st.header("Scenario Analysis (Monte Carlo)")
+    st.markdown("""
+Simulate many portfolios at once to see the **distribution** of residual risk outcomes rather than a single draw.
+Each scenario draws fresh Inherent Risk and Control Effectiveness ratings for every unit, exactly as the synthetic
+data generator does, and maps them to Residual Risk with the selected method.
+""")
+
+    num_scenarios = st.slider("Number of Scenarios", 100, 20000, 2000, step=100)
+    num_units = st.slider("Risk Units per Portfolio", 10, 5000, 100)
+    calculation_method = st.radio("Residual Risk Calculation Method", tuple(grid_method_names()), key='monte_carlo_method')
+    high_share_threshold = st.slider("High Residual Risk Threshold (share of units)", 0.0, 1.0, 0.3, step=0.01)
+    seed = int(st.number_input("Random Seed", min_value=0, value=42, step=1, key='monte_carlo_seed'))
+    use_all_cores = st.checkbox("Use all CPU cores", False)
+
+    simulation_cache = session_cache(st.session_state, 'simulation_cache', SIMULATION_CACHE_SIZE)
+    max_workers = (os.cpu_count() or 1) if use_all_cores else 1
+    scenarios = simulation_cache.get_or_compute(
+        (num_scenarios, num_units, calculation_method, seed),
+        lambda: simulate_portfolios(num_scenarios, num_units, calculation_method, seed=seed, max_workers=max_workers))
+
+    quantile_table, exceedance = summarize_scenarios(scenarios, high_share_threshold)
+    st.metric(f"P(more than {high_share_threshold:.0%} of units are High residual risk)", f"{exceedance:.1%}")
+
+    st.subheader("Distribution of Outcomes")
+    with stage('chart_render_scenarios'):
+        st.altair_chart(plot_high_share_distribution_altair(scenarios, high_share_threshold), use_container_width=True)
+
+    st.subheader("Quantiles of Per-Scenario Statistics")
+    st.dataframe(quantile_table.rename_axis('Quantile').style.format({
+        'Share_Low': '{:.1%}', 'Share_Medium': '{:.1%}', 'Share_High': '{:.1%}', 'Mean_Residual_Score': '{:.3f}'
+    }))
+
+    stats = simulation_cache.stats()
+    st.caption(f"Simulation cache: {stats['hits']} hits, {stats['misses']} misses ({stats['size']}/{stats['maxsize']} entries)")
@@ -0,0 +1,57 @@
+import streamlit as st
+
+from application_pages.panel import RiskPanel
+from application_pages.charts import trend_line_chart, heatmap_chart, plot_rating_shares_altair
+from application_pages.instrumentation import stage
+
+MAX_PANEL_CYCLES = 60
+
+def _append_cycle():
+    st.session_state['panel_cycles'] = min(st.session_state['panel_cycles'] + 1, MAX_PANEL_CYCLES)
+
+def session_panel(num_units, num_cycles, seed):
+    """Returns the session's panel for (num_units, seed) with num_cycles cycles.
+
+    Adding cycles to an existing panel only evolves and aggregates the new ones; fewer cycles or
+    other parameters regenerate it.
+    """
+    key, panel = st.session_state.get('risk_panel', (None, None))
+    if key != (num_units, seed) or len(panel) > num_cycles:
+        panel = RiskPanel.generate(num_units, 1, seed)
+        st.session_state['risk_panel'] = ((num_units, seed), panel)
+    while len(panel) < num_cycles:
+        panel.append_cycle()
+    return panel
+
+def run_page5():
+    st.header("Panel Analysis")
+    st.markdown("""
+Follow the same units across many assessment cycles. Each cycle evolves from the previous one: ratings drift up or
+down a level now and then, so the trend is a real change over time rather than a comparison of different units.
+Appending a cycle only scores and aggregates that cycle.
+""")
+
+    num_units = st.slider("Number of Risk Units", 10, 10_000, 500, step=10, key='panel_units')
+    if 'panel_cycles' not in st.session_state:
+        st.session_state['panel_cycles'] = 8
+    num_cycles = st.slider("Assessment Cycles", 2, MAX_PANEL_CYCLES, key='panel_cycles')
+    st.button("Append Next Cycle", on_click=_append_cycle, disabled=num_cycles >= MAX_PANEL_CYCLES)
+    seed = int(st.number_input("Random Seed", min_value=0, value=42, step=1, key='panel_seed'))
+
+    panel = session_panel(num_units, num_cycles, seed)
+    calculation_method = st.radio("Residual Risk Calculation Method", tuple(panel.methods), key='panel_method')
+
+    st.subheader("Trend of Average Residual Risk Rating")
+    with stage('chart_render_panel_trend'):
+        st.altair_chart(trend_line_chart(panel.trend(calculation_method)), use_container_width=True)
+    with stage('chart_render_panel_shares'):
+        st.altair_chart(plot_rating_shares_altair(panel.rating_shares(calculation_method)), use_container_width=True)
+
+    st.subheader("Cycle Detail")
+    cycle = st.select_slider("Assessment Cycle", options=panel.cycles, value=panel.cycles[-1])
+    with stage('chart_render_panel_heatmap'):
+        st.altair_chart(heatmap_chart(panel.heatmap(calculation_method, cycle), title=f'Residual Risk by Inherent Risk & Control Effectiveness, {cycle}'),
+                        use_container_width=True)
+    st.markdown(f"**Residual risk roll-forward into {cycle}** (Opening + New + Migrated In - Migrated Out - Exited = Closing)")
+    st.dataframe(panel.roll_forward(calculation_method, cycle), hide_index=True)
+    st.caption(f"{len(panel)} cycles x {num_units} units held in {panel.nbytes / 2 ** 20:.1f} MiB (compact long format)")
@@ -0,0 +1,241 @@
+import pandas as pd
+import numpy as np
+
+from application_pages.schema import (RISK_RATINGS, RESIDUAL_RISK_LEVELS, COMPACT_DTYPES, categorical_from_codes, is_compact, to_compact)
+from application_pages.generation import SEED_BLOCK_SIZE, generate_unit_range, seeded_unit_columns
+from application_pages.validation import validate_schema
+from application_pages.methods import applicable_methods, attach_residuals, compute_residuals
+from application_pages.aggregations import aggregate_heatmap, aggregate_trend, residual_risk_codes
+from application_pages.instrumentation import timed
+
+# Panel mode: the same units assessed over many cycles, stored in long format as one compact frame
+# per cycle (about 20 bytes per unit-cycle). Each appended cycle is validated, scored with every
+# applicable method in one pass, and folded into per-cycle trend, heatmap and roll-forward
+# aggregates, so appending costs O(units) however long the history is.
+#
+# Generated cycles evolve from the previous one: ratings and Process_Complexity move one level up or
+# down with a small probability, Control_Key_Status occasionally flips and the operational metrics
+# follow a stationary AR(1). The first cycle is the regular seeded cross-section, and every later
+# cycle draws from per-(unit block, cycle) streams, so a unit's history depends only on the seed.
+#
+# The one-level steps are symmetric and clipped at the ends, so each walk's stationary distribution
+# is uniform over the levels it covers. The rating walks therefore cover exactly the levels the
+# generator draws uniformly from (RISK_RATINGS, so Inherent_Risk_Rating never reaches 'Very High'):
+# the first cycle already has the stationary mix and generated panels have no built-in trend.
+# Units loaded with a rating above those levels can step down but not back up.
+
+RATING_CHANGE_PROBABILITY = 0.2 # Split evenly between a one-level rise and fall
+COMPLEXITY_CHANGE_PROBABILITY = 0.1
+KEY_STATUS_FLIP_PROBABILITY = 0.05
+METRIC_PERSISTENCE = 0.8 # AR(1) coefficient of the operational metrics
+METRIC_MOMENTS = {'Operational_Metric_1': (50, 10), 'Operational_Metric_2': (100, 20)} # Generator mean, std
+FIRST_CYCLE = 2020
+
+# Roll-forward row/column for units absent from a cycle (new in the later one, or exited)
+_ABSENT = len(RESIDUAL_RISK_LEVELS)
+
+def _draw_transition_block(seed, cycle_index, block_index):
+    """Draws the uniforms and normals driving one cycle step for one SEED_BLOCK_SIZE block of units."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block_index, cycle_index)))
+    size = SEED_BLOCK_SIZE
+    return {
+        'Inherent_Risk_Rating': rng.random(size, dtype=np.float32),
+        'Control_Effectiveness_Rating': rng.random(size, dtype=np.float32),
+        'Process_Complexity': rng.random(size, dtype=np.float32),
+        'Control_Key_Status': rng.random(size, dtype=np.float32),
+        'Operational_Metric_1': rng.standard_normal(size, dtype=np.float32),
+        'Operational_Metric_2': rng.standard_normal(size, dtype=np.float32),
+    }
+
+def _step(values, uniforms, probability, low, high):
+    """Moves each value one step down (u < p/2) or up (u > 1 - p/2), clipped to [low, high].
+
+    Values already above high are clipped to their own level instead.
+    """
+    step = (uniforms > 1 - probability / 2).astype(np.int8) - (uniforms < probability / 2).astype(np.int8)
+    return np.clip(values + step, low, np.maximum(values, high)).astype(values.dtype)
+
+def evolve_cycle(previous, seed, cycle_index, cycle=None):
+    """Generates the next cycle of a panel from the previous cycle's compact frame.
+
+    Unit i (0-based position in previous) draws from the stream of its seed block, so the result
+    does not depend on how many units the panel holds. Static attributes are carried over.
+    """
+    draws = seeded_unit_columns(lambda block_index: _draw_transition_block(seed, cycle_index, block_index), 0, len(previous))
+    frame = previous.copy(deep=False)
+
+    inherent = previous['Inherent_Risk_Rating'].cat.codes.to_numpy()
+    frame['Inherent_Risk_Rating'] = categorical_from_codes(
+        _step(inherent, draws['Inherent_Risk_Rating'], RATING_CHANGE_PROBABILITY, 0, len(RISK_RATINGS) - 1),
+        'Inherent_Risk_Rating')
+    control = previous['Control_Effectiveness_Rating'].cat.codes.to_numpy()
+    frame['Control_Effectiveness_Rating'] = categorical_from_codes(
+        _step(control, draws['Control_Effectiveness_Rating'], RATING_CHANGE_PROBABILITY, 0, len(RISK_RATINGS) - 1),
+        'Control_Effectiveness_Rating')
+    frame['Process_Complexity'] = _step(previous['Process_Complexity'].to_numpy(), draws['Process_Complexity'],
+                                        COMPLEXITY_CHANGE_PROBABILITY, 1, 10)
+    frame['Control_Key_Status'] = previous['Control_Key_Status'].to_numpy() ^ (draws['Control_Key_Status'] < KEY_STATUS_FLIP_PROBABILITY)
+
+    for col, (mean, std) in METRIC_MOMENTS.items():
+        # Stationary AR(1): the marginal stays N(mean, std) while consecutive cycles are correlated
+        innovation = std * np.sqrt(1 - METRIC_PERSISTENCE ** 2) * draws[col]
+        frame[col] = (mean + METRIC_PERSISTENCE * (previous[col].to_numpy() - mean) + innovation).astype(np.float32)
+
+    next_cycle = int(previous['Assessment_Cycle'].iloc[0]) + 1 if cycle is None else cycle
+    frame['Assessment_Cycle'] = np.full(len(frame), next_cycle, dtype=COMPACT_DTYPES['Assessment_Cycle'])
+    return frame
+
+def roll_forward_counts(previous_ids, previous_codes, ids, codes):
+    """Returns the (levels + 1) x (levels + 1) matrix of residual rating moves between two cycles.
+
+    Rows are the earlier rating and columns the later one; the last row counts units that are new in
+    the later cycle and the last column units that are absent from it.
+    """
+    size = _ABSENT + 1
+    if np.array_equal(previous_ids, ids):
+        return np.bincount(previous_codes * size + codes, minlength=size * size).reshape(size, size)
+
+    positions = pd.Index(previous_ids).get_indexer(ids)
+    from_codes = np.full(len(ids), _ABSENT, dtype=np.intp)
+    found = positions >= 0
+    from_codes[found] = previous_codes[positions[found]]
+    counts = np.bincount(from_codes * size + codes, minlength=size * size).reshape(size, size)
+    exited = pd.Index(ids).get_indexer(previous_ids) < 0
+    counts[:_ABSENT, _ABSENT] = np.bincount(previous_codes[exited], minlength=_ABSENT)
+    return counts
+
+def roll_forward_table(counts):
+    """Turns a roll_forward_counts matrix into Opening + New + Migrated_In - Migrated_Out - Exited = Closing per level."""
+    levels = slice(0, _ABSENT)
+    stayed = np.diag(counts)[levels]
+    return pd.DataFrame({
+        'Residual_Risk_Rating': RESIDUAL_RISK_LEVELS,
+        'Opening': counts[levels, :].sum(axis=1),
+        'New': counts[_ABSENT, levels],
+        'Migrated_In': counts[levels, levels].sum(axis=0) - stayed,
+        'Migrated_Out': counts[levels, levels].sum(axis=1) - stayed,
+        'Exited': counts[levels, _ABSENT],
+        'Closing': counts[:, levels].sum(axis=0),
+    })
+
+class RiskPanel:
+    """Units x assessment cycles in compact long format, with incrementally maintained aggregates."""
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.cycles = []
+        self.methods = None # Fixed by the first cycle: every method that applies to the data
+        self._frames = []
+        self._last_ratings = None # (unit IDs, {method: residual rating codes}) of the latest cycle
+        self._trend = {}
+        self._heatmaps = {}
+        self._roll_forward = {}
+
+    @classmethod
+    def generate(cls, num_units, num_cycles, seed, first_cycle=FIRST_CYCLE):
+        """Generates a seeded panel: the seeded cross-section followed by num_cycles - 1 evolved cycles."""
+        if num_cycles < 1:
+            raise ValueError("num_cycles must be a positive integer.")
+        panel = cls(seed)
+        first = generate_unit_range(0, num_units, True, seed, compact=True)
+        first['Assessment_Cycle'] = np.full(num_units, first_cycle, dtype=COMPACT_DTYPES['Assessment_Cycle'])
+        panel.append_frame(first)
+        for _ in range(num_cycles - 1):
+            panel.append_cycle()
+        return panel
+
+    @classmethod
+    def from_long(cls, df, seed=None):
+        """Builds a panel from long-format data with one row per (unit, Assessment_Cycle)."""
+        if 'Assessment_Cycle' not in df.columns:
+            raise KeyError("Panel data needs an 'Assessment_Cycle' column.")
+        panel = cls(seed)
+        for _, frame in df.groupby('Assessment_Cycle', sort=True, observed=True):
+            panel.append_frame(frame.reset_index(drop=True))
+        return panel
+
+    def __len__(self):
+        return len(self.cycles)
+
+    @property
+    def nbytes(self):
+        """Memory held by the stored cycle frames (an upper bound: unchanged static columns are shared
+        between cycles by copy-on-write but counted in each)."""
+        return int(sum(frame.memory_usage(index=False).sum() for frame in self._frames))
+
+    @timed('panel_append')
+    def append_frame(self, frame):
+        """Validates one cycle's frame, scores it and folds it into the aggregates.
+
+        Raises ValueError if the frame fails validation, spans several cycles, or does not come
+        after the latest cycle.
+        """
+        validate_schema(frame).raise_first()
+        cycles = frame['Assessment_Cycle'].unique()
+        if len(cycles) != 1:
+            raise ValueError("Each appended frame must hold exactly one Assessment_Cycle.")
+        cycle = int(cycles[0])
+        if self.cycles and cycle <= self.cycles[-1]:
+            raise ValueError(f"Assessment_Cycle {cycle} does not come after the latest cycle {self.cycles[-1]}.")
+        frame = frame if is_compact(frame) else to_compact(frame)
+
+        if self.methods is None:
+            self.methods = applicable_methods(frame)
+        residuals = compute_residuals(frame, self.methods)
+        ids = frame['Risk_Assessment_Unit_ID'].to_numpy()
+        ratings = {}
+        for method, residual_columns in residuals.items():
+            scored = attach_residuals(frame, residual_columns)
+            ratings[method] = residual_risk_codes(scored)
+            self._trend.setdefault(method, []).append(aggregate_trend(scored))
+            self._heatmaps.setdefault(method, []).append(aggregate_heatmap(scored).assign(Assessment_Cycle=cycle))
+            if self._last_ratings is None:
+                counts = roll_forward_counts(ids[:0], ratings[method][:0], ids, ratings[method])
+            else:
+                previous_ids, previous_ratings = self._last_ratings
+                counts = roll_forward_counts(previous_ids, previous_ratings[method], ids, ratings[method])
+            self._roll_forward.setdefault(method, []).append(counts)
+
+        self._last_ratings = (ids, ratings)
+        self._frames.append(frame)
+        self.cycles.append(cycle)
+        return self
+
+    def append_cycle(self):
+        """Evolves the latest cycle one step (needs a seed) and appends it."""
+        if not self._frames:
+            raise ValueError("The panel has no cycle to evolve from.")
+        if self.seed is None:
+            raise ValueError("Generating a new cycle requires a panel seed.")
+        return self.append_frame(evolve_cycle(self._frames[-1], self.seed, len(self.cycles)))
+
+    def cycle_frame(self, cycle):
+        """Returns the compact frame of one cycle."""
+        return self._frames[self.cycles.index(cycle)]
+
+    def to_long(self):
+        """Returns the whole panel as one long frame (this concatenates, so it copies every cycle)."""
+        return pd.concat(self._frames, ignore_index=True)
+
+    def trend(self, method):
+        """Mean numerical Residual_Risk_Rating (1-3) and unit count per cycle, as aggregate_trend returns."""
+        return pd.concat(self._trend[method], ignore_index=True)
+
+    def heatmap(self, method, cycle=None):
+        """aggregate_heatmap of one cycle (default: the latest) with its Assessment_Cycle."""
+        return self._heatmaps[method][-1 if cycle is None else self.cycles.index(cycle)]
+
+    def roll_forward(self, method, cycle=None):
+        """Residual rating roll-forward into one cycle (default: the latest); see roll_forward_table."""
+        return roll_forward_table(self._roll_forward[method][-1 if cycle is None else self.cycles.index(cycle)])
+
+    def rating_shares(self, method):
+        """Share of units at each residual rating per cycle, in long format for charting."""
+        closing = np.stack([counts[:, :_ABSENT].sum(axis=0) for counts in self._roll_forward[method]])
+        shares = closing / np.maximum(closing.sum(axis=1, keepdims=True), 1)
+        return pd.DataFrame({
+            'Assessment_Cycle': np.repeat(self.cycles, _ABSENT),
+            'Residual_Risk_Rating': np.tile(RESIDUAL_RISK_LEVELS, len(self.cycles)),
+            'unit_count': closing.ravel(),
+            'share': shares.ravel(),
+        })
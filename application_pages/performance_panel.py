@@ -0,0 +1,53 @@
+import os
+
+import streamlit as st
+import pandas as pd
+
+from application_pages import instrumentation
+
+# Optional sidebar panel over application_pages.instrumentation. QULAB_METRICS_FILE, if set, is
+# rewritten after every script run (Prometheus text, or a JSON line appended for .json/.jsonl).
+METRICS_FILE = os.environ.get('QULAB_METRICS_FILE')
+
+def _apply_toggle():
+    instrumentation.set_enabled(st.session_state['instrumentation_enabled'])
+
+def enable_from_sidebar():
+    """Shows the instrumentation toggle before the page runs; returns whether recording is on.
+
+    Recording is process-wide, so the checkbox mirrors the shared flag on every run and only a click
+    on it (in any session) changes the flag; other sessions' reruns leave it alone.
+    """
+    st.session_state['instrumentation_enabled'] = instrumentation.is_enabled()
+    st.sidebar.checkbox("Performance instrumentation", key='instrumentation_enabled', on_change=_apply_toggle,
+                        help="Time every pipeline stage and chart build. Recording and metrics are shared by all sessions.")
+    return instrumentation.is_enabled()
+
+def stage_table(stats):
+    """Turns an instrumentation snapshot into a display frame with millisecond latencies and MiB deltas."""
+    table = pd.DataFrame.from_dict(stats, orient='index')
+    latencies = table.filter(like='_seconds').columns.drop('total_seconds')
+    table[latencies] *= 1000
+    table = table.rename(columns={col: col.replace('_seconds', ' (ms)') for col in latencies})
+    for col in ('last_rss_delta_bytes', 'max_rss_delta_bytes'):
+        table[col.replace('_bytes', ' (MiB)')] = pd.to_numeric(table.pop(col)) / 2 ** 20
+    return table.drop(columns='total_seconds').rename_axis('stage')
+
+def run_performance_panel():
+    """Renders the per-stage latency panel in the sidebar (after the page, so it includes this run)."""
+    if METRICS_FILE and instrumentation.is_enabled():
+        instrumentation.export_metrics(METRICS_FILE)
+    if not instrumentation.is_enabled():
+        return
+
+    with st.sidebar.expander("Stage Timings", expanded=True):
+        stats = instrumentation.snapshot()
+        if not stats:
+            st.caption("No stages recorded yet.")
+            return
+        st.dataframe(stage_table(stats).style.format(precision=2))
+        st.caption(f"Percentiles over the last {instrumentation.ROLLING_WINDOW} runs of each stage.")
+        st.download_button("Prometheus metrics", instrumentation.prometheus_text(stats), file_name='qulab_metrics.prom')
+        st.download_button("JSON snapshot", instrumentation.json_record(stats), file_name='qulab_metrics.jsonl')
+        if st.button("Reset timings"):
+            instrumentation.reset()
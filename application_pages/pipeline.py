@@ -0,0 +1,206 @@
+import json
+import os
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import numpy as np
+
+from application_pages.generation import generate_unit_range
+from application_pages.methods import attach_residuals, calculate_all_residual_risks, compute_residuals, method_names
+from application_pages.validation import PRIMARY_KEY, UniqueIdTracker, validate_schema
+from application_pages.aggregations import (add_chart_counts, calculate_all_chart_counts, chart_counts,
+                                            scatter_from_counts, trend_from_counts, heatmap_from_counts)
+from application_pages.instrumentation import timed
+
+# The pipeline engine: ingest or generation -> validation -> residual risk -> chart counts -> chart
+# aggregates. The stage entry points below are what the Streamlit pages derive from a stored dataset
+# (handle.derived('validation', validation_stage), ...) and what run_pipeline chains for batch jobs;
+# run_batch fans partitions out to a process pool and combines their chart counts.
+
+BatchResult = namedtuple('BatchResult', ['summaries', 'combined_error'])
+
+_FINISHERS = {'scatter': scatter_from_counts, 'heatmap': heatmap_from_counts, 'trend': trend_from_counts}
+
+@timed('load')
+def load_dataset(path):
+    """Ingest stage: reads a CSV, Parquet or Arrow IPC register with ingest_register (compact schema, validated).
+
+    Returns IngestResult(df, report); df is None if validation failed.
+    """
+    from application_pages.ingest import ingest_register # pyarrow's readers load only when a file is ingested
+    return ingest_register(path)
+
+def validation_stage(df):
+    """Validation stage: the ValidationReport of df."""
+    return validate_schema(df)
+
+def residual_stage(df, methods=None):
+    """Residual risk stage: {method: residual columns} for methods (default: every registered method that applies to df)."""
+    return calculate_all_residual_risks(df) if methods is None else compute_residuals(df, methods)
+
+def chart_count_stage(df, residuals):
+    """Chart count stage: {method: chart_counts tables} of df scored by each method in residuals."""
+    return calculate_all_chart_counts(df, residuals)
+
+def chart_aggregates_from_counts(counts):
+    """Aggregation stage: finishes a chart_counts dict into the reduced frames behind the page3 charts."""
+    return {name: _FINISHERS[name](table) for name, table in counts.items()}
+
+def chart_aggregates(df, has_time_series=None):
+    """The reduced frames behind the page3 charts of a scored df, keyed by chart name."""
+    counts = chart_counts(df)
+    if has_time_series is False:
+        counts.pop('trend', None)
+    return chart_aggregates_from_counts(counts)
+
+def run_pipeline(df, methods=None, timings=None, report=None):
+    """Validates df, scores it with every method (default: all that apply) and aggregates each result.
+
+    Returns (report, {method: calculated df}, {method: chart counts}, {method: aggregates}). A report
+    from ingest can be passed to skip validating again. Stage wall times in seconds are added to the
+    timings dict if one is given. Raises ValueError if validation fails.
+    """
+    timings = {} if timings is None else timings
+
+    if report is None:
+        start = time.perf_counter()
+        report = validation_stage(df)
+        timings['validate'] = time.perf_counter() - start
+    if not report.ok:
+        raise ValueError("Validation failed: " + "; ".join(report.messages()))
+
+    # All methods are scored in one pass over the shared rating codes
+    start = time.perf_counter()
+    residuals = residual_stage(df, methods)
+    timings['calculate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    counts = chart_count_stage(df, residuals)
+    aggregates = {method: chart_aggregates_from_counts(method_counts) for method, method_counts in counts.items()}
+    timings['aggregate'] = time.perf_counter() - start
+
+    calculated = {method: attach_residuals(df, residual_columns) for method, residual_columns in residuals.items()}
+    return report, calculated, counts, aggregates
+
+@timed('write')
+def _write_outputs(output_dir, calculated, aggregates):
+    """Writes per-method residual columns (keyed by unit ID) to Parquet and the aggregates to CSV."""
+    os.makedirs(output_dir, exist_ok=True)
+    first = next(iter(calculated.values()))
+    scores = pd.DataFrame({'Risk_Assessment_Unit_ID': first['Risk_Assessment_Unit_ID'].to_numpy()})
+    for method, df in calculated.items():
+        scores[f'Residual_Risk_Score_{method}'] = df['Residual_Risk_Score'].to_numpy()
+        scores[f'Residual_Risk_Rating_{method}'] = df['Residual_Risk_Rating'].to_numpy()
+    scores.to_parquet(os.path.join(output_dir, 'residual_risk.parquet'), index=False)
+
+    for method, method_aggregates in aggregates.items():
+        for name, frame in method_aggregates.items():
+            frame.to_csv(os.path.join(output_dir, f'{name}_{method}.csv'), index=False)
+
+def run_partition(task):
+    """Process-pool worker: runs the full pipeline for one partition and writes its outputs.
+
+    task is a dict with 'name', 'output_dir', 'methods' and either 'path' (ingest) or 'generate'
+    (keyword arguments for generate_unit_range). Never raises: failures are returned in the summary,
+    which on success also carries the partition's chart counts and unit IDs for run_batch to combine.
+    """
+    timings = {}
+    summary = {'name': task['name'], 'status': 'ok', 'rows': 0, 'timings': timings, 'error': None}
+    try:
+        start = time.perf_counter()
+        if 'path' in task:
+            df, report = load_dataset(task['path'])
+            if df is None:
+                raise ValueError("Validation failed: " + "; ".join(report.messages()))
+        else:
+            df, report = generate_unit_range(**task['generate']), None
+        timings['load'] = time.perf_counter() - start
+        summary['rows'] = len(df)
+
+        _, calculated, counts, aggregates = run_pipeline(df, task['methods'], timings, report=report)
+
+        start = time.perf_counter()
+        _write_outputs(os.path.join(task['output_dir'], task['name']), calculated, aggregates)
+        timings['write'] = time.perf_counter() - start
+        summary['counts'] = counts
+        summary['ids'] = df[PRIMARY_KEY].to_numpy()
+    except Exception as e:
+        summary.update(status='failed', error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+    summary['timings']['total'] = sum(timings.values())
+    return summary
+
+def combine_chart_counts(partition_counts):
+    """Adds per-partition chart_counts dicts into register-wide ones (count tables add exactly)."""
+    combined = {}
+    for counts in partition_counts:
+        for name, table in counts.items():
+            combined[name] = add_chart_counts({name: combined[name]}, {name: table})[name] if name in combined else table
+    return combined
+
+def duplicate_ids_across(partition_ids):
+    """Counts unit IDs repeated across partitions (each partition's own IDs are already validated unique)."""
+    tracker = UniqueIdTracker()
+    for ids in partition_ids:
+        tracker.update(ids)
+    return tracker.duplicates
+
+def run_batch(tasks, output_dir, methods=None, max_workers=None, progress=None):
+    """Runs run_partition for every task across a process pool and writes a batch summary.
+
+    tasks are dicts with 'name' and either 'path' or 'generate' (see run_partition); together the
+    partitions form one register. Unless a unit ID repeats across the successful partitions, their
+    combined aggregates are written under output_dir/combined. Per-partition timings and failures
+    go to output_dir/batch_summary.json. progress, if given, is called with each partition summary
+    as it completes. Returns BatchResult(summaries, combined_error), combined_error being None when
+    the combined aggregates were written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    methods = method_names() if methods is None else list(methods)
+    tasks = [dict(task, output_dir=output_dir, methods=list(methods)) for task in tasks]
+
+    summaries = []
+    if max_workers == 1:
+        for task in tasks:
+            summaries.append(run_partition(task))
+            if progress:
+                progress(summaries[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run_partition, task): task['name'] for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    summary = future.result()
+                except Exception as e: # The worker process itself died
+                    summary = {'name': futures[future], 'status': 'failed', 'rows': 0, 'timings': {},
+                               'error': f"{type(e).__name__}: {e}"}
+                summaries.append(summary)
+                if progress:
+                    progress(summary)
+    summaries.sort(key=lambda summary: summary['name'])
+
+    succeeded = [summary for summary in summaries if summary['status'] == 'ok']
+    combined_error = None
+    duplicates = duplicate_ids_across(summary.pop('ids') for summary in succeeded)
+    if duplicates:
+        combined_error = (f"Duplicate {PRIMARY_KEY} values found across partitions. ({duplicates} repeated IDs); "
+                          f"combined aggregates not written")
+    else:
+        combined_dir = os.path.join(output_dir, 'combined')
+        os.makedirs(combined_dir, exist_ok=True)
+        for method in methods:
+            combined = combine_chart_counts([summary['counts'][method] for summary in succeeded])
+            for name, frame in chart_aggregates_from_counts(combined).items():
+                frame.to_csv(os.path.join(combined_dir, f'{name}_{method}.csv'), index=False)
+
+    with open(os.path.join(output_dir, 'batch_summary.json'), 'w') as f:
+        json.dump({
+            'partitions': [{k: v for k, v in summary.items() if k != 'counts'} for summary in summaries],
+            'succeeded': len(succeeded),
+            'failed': len(summaries) - len(succeeded),
+            'rows': int(np.sum([summary['rows'] for summary in succeeded])),
+            'combined_error': combined_error,
+        }, f, indent=2)
+    return BatchResult(summaries, combined_error)
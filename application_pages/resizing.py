@@ -0,0 +1,81 @@
+import pandas as pd
+
+from application_pages.generation import generate_unit_range
+from application_pages.validation import PRIMARY_KEY, ValidationReport, validate_schema
+from application_pages.methods import compute_residuals
+from application_pages.aggregations import add_chart_counts, calculate_all_chart_counts
+from application_pages.instrumentation import timed
+
+# Resizing a seeded synthetic register. A unit's values depend only on (seed, unit position), so
+# the register at n units is the first n units of any larger one: growing appends only the new
+# units and shrinking is a zero-copy slice. The values derived from a register (validation report,
+# residual columns, chart count tables) are carried over the same way, touching only the units
+# added or removed, so moving the unit-count slider costs the size of the move, not of the register.
+#
+# Every function here takes `previous`, the register before the resize, and `df`, the register
+# after it; one is always a prefix of the other.
+
+@timed('resize')
+def resize_register(df, num_units, has_time_series, seed, compact=False):
+    """Returns the seeded register at num_units units, given df holding its first len(df) units.
+
+    Shrinking returns a slice of df that shares its column buffers (pinning them while it lives);
+    growing generates only units len(df) to num_units.
+    """
+    if num_units <= len(df):
+        return df.iloc[:num_units]
+    added = generate_unit_range(len(df), num_units, has_time_series, seed, compact=compact)
+    return pd.concat([df, added], ignore_index=True)
+
+def resize_validation(report, previous, df):
+    """ValidationReport for df from previous's report, validating only the units added (if any)."""
+    if not report.ok:
+        return validate_schema(df)
+    if len(df) <= len(previous):
+        # Every check is per unit or a uniqueness check, so any subset of valid units is valid
+        return ValidationReport([], len(df))
+    added = df.iloc[len(previous):]
+    if validate_schema(added).ok and added[PRIMARY_KEY].min() > previous[PRIMARY_KEY].max():
+        return ValidationReport([], len(df)) # The new IDs cannot repeat an existing one
+    return validate_schema(df) # For the full report
+
+def resize_residuals(residuals, previous, df):
+    """Carries compute_residuals output for previous over to df, scoring only the units added."""
+    if len(df) <= len(previous):
+        return {method: columns.iloc[:len(df)] for method, columns in residuals.items()}
+    added = compute_residuals(df.iloc[len(previous):], list(residuals))
+    return {method: pd.concat([columns, added[method]], ignore_index=True) for method, columns in residuals.items()}
+
+def resize_chart_counts(counts, previous, previous_residuals, df, residuals):
+    """Carries calculate_all_chart_counts output for previous over to df, counting only the changed units."""
+    start, stop = sorted((len(previous), len(df)))
+    if len(df) < stop - start: # Shrunk below half: counting what is left is cheaper than subtracting
+        return calculate_all_chart_counts(df, residuals)
+    if len(df) > len(previous):
+        sign, changed, changed_residuals = 1, df.iloc[start:stop], residuals
+    else:
+        sign, changed, changed_residuals = -1, previous.iloc[start:stop], previous_residuals
+    changed_counts = calculate_all_chart_counts(
+        changed, {method: columns.iloc[start:stop] for method, columns in changed_residuals.items()})
+    return {method: add_chart_counts(method_counts, changed_counts[method], sign) for method, method_counts in counts.items()}
+
+def resize_dataset(store, previous, key, num_units, has_time_series, seed, compact=False):
+    """Acquires key in store as previous's seeded register resized to num_units units.
+
+    previous is a DatasetHandle to the same register at another size. Its derived 'validation',
+    'residuals' and 'chart_counts' values, where already computed, are carried over to the new
+    dataset by delta. Returns the new handle; previous is left for the caller to release.
+    """
+    previous_df = previous.df
+    handle = store.acquire(key, lambda: resize_register(previous_df, num_units, has_time_series, seed, compact))
+
+    report = previous.peek('validation')
+    if report is not None:
+        handle.derived('validation', lambda df: resize_validation(report, previous_df, df))
+    previous_residuals = previous.peek('residuals')
+    if previous_residuals is not None:
+        residuals = handle.derived('residuals', lambda df: resize_residuals(previous_residuals, previous_df, df))
+        counts = previous.peek('chart_counts')
+        if counts is not None:
+            handle.derived('chart_counts', lambda df: resize_chart_counts(counts, previous_df, previous_residuals, df, residuals))
+    return handle
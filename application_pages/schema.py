@@ -0,0 +1,57 @@
+import pandas as pd
+import numpy as np
+
+# Allowed values for each rating column. Rating lists are in score order: position i has score i + 1.
+RISK_UNIT_TYPES = ['Business Unit', 'Department', 'Team']
+RISK_RATINGS = ['Low', 'Medium', 'High'] # Levels drawn by the synthetic generator
+INHERENT_RISK_LEVELS = ['Low', 'Medium', 'High', 'Very High']
+CONTROL_EFFECTIVENESS_LEVELS = ['Low', 'Medium', 'High'] # Assuming 'Low' means less effective, 'High' means more.
+CONTROL_TYPES = ['Preventative', 'Detective', 'Corrective']
+RESIDUAL_RISK_LEVELS = ['Low', 'Medium', 'High']
+
+# Opt-in compact in-memory schema: fixed, ordered categoricals (int8 codes) and narrow numerics.
+# Unit IDs stay int32 so registers well past 2**15 units still fit.
+COMPACT_DTYPES = {
+    'Risk_Assessment_Unit_ID': np.dtype('int32'),
+    'Risk_Assessment_Unit_Type': pd.CategoricalDtype(RISK_UNIT_TYPES, ordered=True),
+    'Inherent_Risk_Rating': pd.CategoricalDtype(INHERENT_RISK_LEVELS, ordered=True),
+    'Control_Effectiveness_Rating': pd.CategoricalDtype(CONTROL_EFFECTIVENESS_LEVELS, ordered=True),
+    'Control_Type': pd.CategoricalDtype(CONTROL_TYPES, ordered=True),
+    'Control_Key_Status': np.dtype('bool'),
+    'Process_Complexity': np.dtype('int8'),
+    'Operational_Metric_1': np.dtype('float32'),
+    'Operational_Metric_2': np.dtype('float32'),
+    'Assessment_Cycle': np.dtype('int16'),
+    'Residual_Risk_Rating': pd.CategoricalDtype(RESIDUAL_RISK_LEVELS, ordered=True),
+}
+
+def is_categorical(series):
+    """Returns True if the Series uses a pandas Categorical dtype."""
+    return isinstance(series.dtype, pd.CategoricalDtype)
+
+def is_compact(df):
+    """Returns True if the DataFrame's rating columns use the compact categorical schema."""
+    return 'Inherent_Risk_Rating' in df.columns and is_categorical(df['Inherent_Risk_Rating'])
+
+def to_compact(df):
+    """Returns a copy of df converted to COMPACT_DTYPES; columns outside the schema are left as-is.
+
+    Values outside a column's fixed categories become NaN, so validate before converting
+    data that has not been checked.
+    """
+    return df.astype({col: dtype for col, dtype in COMPACT_DTYPES.items() if col in df.columns})
+
+def categorical_from_codes(codes, column):
+    """Builds a compact Categorical for column directly from integer codes, without creating strings."""
+    return pd.Categorical.from_codes(codes, dtype=COMPACT_DTYPES[column])
+
+def encode_ratings(ratings, levels):
+    """Encodes a rating Series as integer codes into levels; unknown values and nulls become -1."""
+    if is_categorical(ratings):
+        # Compact schema: remap the existing category codes, no string comparison per row
+        codes, uniques = ratings.cat.codes.to_numpy(), ratings.cat.categories
+    else:
+        # Factorize first so the string comparison only runs over the handful of distinct values
+        codes, uniques = pd.factorize(ratings)
+    level_codes = np.append(pd.Index(levels).get_indexer(uniques), -1) # Trailing -1 catches the null sentinel
+    return level_codes[codes]
@@ -0,0 +1,220 @@
+from collections import namedtuple
+
+import pandas as pd
+import numpy as np
+
+from application_pages.schema import (RISK_UNIT_TYPES, INHERENT_RISK_LEVELS, CONTROL_EFFECTIVENESS_LEVELS,
+                                      CONTROL_TYPES, is_categorical)
+from application_pages.instrumentation import timed
+
+# Declarative description of one column: its dtype kind, the allowed values (None = any) and
+# whether the column must be present.
+ColumnRule = namedtuple('ColumnRule', ['kind', 'allowed', 'required'], defaults=[None, True])
+
+PRIMARY_KEY = 'Risk_Assessment_Unit_ID'
+
+UNIT_SCHEMA = {
+    'Risk_Assessment_Unit_ID': ColumnRule('numeric'),
+    'Risk_Assessment_Unit_Type': ColumnRule('string', RISK_UNIT_TYPES),
+    'Inherent_Risk_Rating': ColumnRule('string', INHERENT_RISK_LEVELS),
+    'Control_Effectiveness_Rating': ColumnRule('string', CONTROL_EFFECTIVENESS_LEVELS),
+    'Control_Type': ColumnRule('string', CONTROL_TYPES),
+    'Control_Key_Status': ColumnRule('boolean'),
+    'Process_Complexity': ColumnRule('numeric'),
+    'Operational_Metric_1': ColumnRule('numeric'),
+    'Operational_Metric_2': ColumnRule('numeric'),
+    'Assessment_Cycle': ColumnRule('numeric', required=False),
+}
+
+# kind -> (dtype predicate, wording used in the error message)
+_KIND_CHECKS = {
+    'numeric': (pd.api.types.is_numeric_dtype, 'numeric'),
+    'string': (pd.api.types.is_string_dtype, 'string'), # Also true for categoricals with string categories
+    'boolean': (pd.api.types.is_bool_dtype, 'boolean'),
+}
+
+# Report order matches the order the original validate_data raised in
+_STAGES = ('missing', 'duplicate', 'null', 'dtype', 'values')
+
+# IDs in [0, BITMAP_ID_LIMIT) are tracked in a bitmap (1 bit per ID, 16 MiB at the limit);
+# anything else falls back to a merged sorted run of seen IDs.
+BITMAP_ID_LIMIT = 2 ** 27
+
+class ValidationReport:
+    """The full list of problems found by SchemaValidator, in the order validate_data raises them."""
+
+    def __init__(self, errors, num_rows):
+        self.errors = errors # List of (stage, exception class, message)
+        self.num_rows = num_rows
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def messages(self):
+        """Returns the error messages in report order."""
+        return [message for _, _, message in self.errors]
+
+    def raise_first(self):
+        """Raises the first error as its KeyError/ValueError/TypeError, like the original validate_data."""
+        if self.errors:
+            _, exc_type, message = self.errors[0]
+            raise exc_type(message)
+
+class UniqueIdTracker:
+    """Incrementally detects duplicate primary keys across chunks without holding a hash set."""
+
+    def __init__(self):
+        self.duplicates = 0
+        self._bitmap = np.zeros(0, dtype=np.uint8)
+        self._sorted_run = np.zeros(0, dtype=np.int64) # Seen integer IDs outside the bitmap range
+        self._other_run = None # Seen IDs that are not integers (fractional floats, strings)
+
+    def update(self, ids):
+        """Records a chunk of IDs (nulls already removed) and counts any repeats."""
+        ids = np.asarray(ids)
+        if ids.dtype.kind == 'f':
+            # 2.0 and 2 are the same ID, so integral floats take the integer paths
+            integral = (np.floor(ids) == ids) & (ids >= -2.0 ** 63) & (ids < 2.0 ** 63)
+            if not integral.all():
+                self._other_run = self._merge_run(self._other_run, ids[~integral])
+            ids = ids[integral].astype(np.int64)
+        if ids.size == 0:
+            return
+        if ids.dtype.kind not in 'iu':
+            self._other_run = self._merge_run(self._other_run, ids)
+        elif ids.min() >= 0 and ids.max() < BITMAP_ID_LIMIT:
+            self._update_bitmap(ids.astype(np.int64, copy=False))
+        else:
+            in_range = (ids >= 0) & (ids < BITMAP_ID_LIMIT)
+            if in_range.any():
+                self._update_bitmap(ids[in_range].astype(np.int64, copy=False))
+            self._sorted_run = self._merge_run(self._sorted_run, ids[~in_range])
+
+    def _update_bitmap(self, ids):
+        lo, hi = int(ids.min()) & ~7, int(ids.max()) + 1
+        span = hi - lo
+        if span <= 8 * ids.size + 4096:
+            # Dense chunk (the usual 1..N case): one bincount gives in-chunk repeats and the presence mask
+            counts = np.bincount(ids - lo, minlength=span)
+            self.duplicates += int(np.maximum(counts - 1, 0).sum())
+            present = np.packbits(counts > 0, bitorder='little')
+            self._grow(hi)
+            window = self._bitmap[lo >> 3:(lo >> 3) + present.size]
+            self.duplicates += int(np.unpackbits(window & present).sum())
+            window |= present
+        else:
+            unique_ids = np.unique(ids)
+            self.duplicates += ids.size - unique_ids.size
+            byte_index, bit = unique_ids >> 3, (1 << (unique_ids & 7)).astype(np.uint8)
+            self._grow(hi)
+            self.duplicates += int(np.count_nonzero(self._bitmap[byte_index] & bit))
+            np.bitwise_or.at(self._bitmap, byte_index, bit)
+
+    def _merge_run(self, run, ids):
+        """Counts repeats of ids within the chunk and against run; returns the merged sorted run."""
+        unique_ids = np.unique(ids)
+        self.duplicates += ids.size - unique_ids.size
+        if run is None or run.size == 0:
+            return unique_ids
+        self.duplicates += int(np.isin(unique_ids, run, assume_unique=True).sum())
+        return np.union1d(run, unique_ids)
+
+    def _grow(self, hi):
+        needed = (hi + 7) >> 3
+        if needed > self._bitmap.size:
+            bitmap = np.zeros(max(needed, 2 * self._bitmap.size), dtype=np.uint8)
+            bitmap[:self._bitmap.size] = self._bitmap
+            self._bitmap = bitmap
+
+class SchemaValidator:
+    """Validates a risk dataset against a declarative schema, one chunk at a time.
+
+    Call update() for each chunk (or once with the whole frame) and then report(). Every column is
+    read at most once per chunk: dtype checks use metadata only, and the null and allowed-value
+    checks share a single factorize (or category-code count) pass. Chunks are never copied.
+    """
+
+    def __init__(self, schema=UNIT_SCHEMA, primary_key=PRIMARY_KEY):
+        self.schema = schema
+        self.primary_key = primary_key
+        self.num_rows = 0
+        self._missing = []
+        self._dtype_errors = {}
+        self._null_counts = {}
+        self._invalid_values = {}
+        self._ids = UniqueIdTracker()
+
+    def update(self, chunk):
+        """Checks one chunk and folds its results into the running report."""
+        self.num_rows += len(chunk)
+        columns = set(chunk.columns)
+
+        for col, rule in self.schema.items():
+            if col not in columns:
+                if rule.required and col not in self._missing:
+                    self._missing.append(col)
+                continue
+            is_kind, kind_name = _KIND_CHECKS[rule.kind]
+            if col not in self._dtype_errors and not is_kind(chunk[col]):
+                self._dtype_errors[col] = f"{col} should be {kind_name}."
+
+        for col in chunk.columns:
+            series = chunk[col]
+            rule = self.schema.get(col)
+            if rule is not None and rule.allowed is not None and col not in self._dtype_errors:
+                nulls, invalid = _scan_allowed(series, rule.allowed)
+                if len(invalid):
+                    self._invalid_values.setdefault(col, set()).update(invalid)
+            elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iub':
+                nulls = 0 # NumPy integer and bool columns cannot hold nulls
+            else:
+                nulls = int(series.isna().sum())
+            if nulls:
+                self._null_counts[col] = self._null_counts.get(col, 0) + nulls
+
+        if self.primary_key in columns:
+            ids = chunk[self.primary_key]
+            if not (isinstance(ids.dtype, np.dtype) and ids.dtype.kind in 'iu'):
+                ids = ids.dropna() # Nulls are reported by the null check, not as duplicates
+            self._ids.update(ids.to_numpy())
+        return self
+
+    def report(self):
+        """Returns a ValidationReport covering every chunk seen so far."""
+        errors = [('missing', KeyError, f"Missing column: {col}") for col in self._missing]
+        if self._ids.duplicates:
+            errors.append(('duplicate', ValueError,
+                           f"Duplicate {self.primary_key} values found. ({self._ids.duplicates} repeated IDs)"))
+        if self._null_counts:
+            errors.append(('null', ValueError, f"Missing values found in DataFrame. Null counts: {self._null_counts}"))
+        for col in self.schema:
+            if col in self._dtype_errors:
+                errors.append(('dtype', TypeError, self._dtype_errors[col]))
+        for col in self.schema:
+            if col in self._invalid_values:
+                errors.append(('values', ValueError,
+                               f"Invalid {col} values: {sorted(self._invalid_values[col], key=str)}. "
+                               f"Allowed values are: {list(self.schema[col].allowed)}"))
+        errors.sort(key=lambda error: _STAGES.index(error[0]))
+        return ValidationReport(errors, self.num_rows)
+
+def _scan_allowed(series, allowed):
+    """One pass over a rating column: returns (null count, distinct values not in allowed)."""
+    if is_categorical(series):
+        # Count each category code once; code -1 (null) lands in bin 0
+        counts = np.bincount(series.cat.codes.to_numpy().astype(np.int64) + 1, minlength=len(series.cat.categories) + 1)
+        used = series.cat.categories[counts[1:] > 0]
+        return int(counts[0]), [value for value in used if value not in allowed]
+    codes, uniques = pd.factorize(series)
+    return int(np.count_nonzero(codes < 0)), [value for value in uniques if value not in allowed]
+
+@timed('validate')
+def validate_schema(df, chunk_size=None, schema=UNIT_SCHEMA):
+    """Validates df in one pass (or in row chunks of chunk_size) and returns the full ValidationReport."""
+    validator = SchemaValidator(schema)
+    if chunk_size is None:
+        return validator.update(df).report()
+    for start in range(0, len(df), chunk_size):
+        validator.update(df.iloc[start:start + chunk_size]) # Positional slices are views, not copies
+    return validator.report()
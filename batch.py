@@ -0,0 +1,85 @@
+"""Headless batch scoring: runs the QuLab pipeline over many registers or partitions in a process pool.
+
+Examples:
+
+    # Score every Parquet/CSV file given (a directory counts as one partition per part file)
+    python batch.py results/ --inputs registers/2024_q1.parquet registers/stress_dataset/
+
+    # Generate and score an 8M-unit seeded synthetic register in 8 partitions of 1M units
+    python batch.py results/ --generate 8 --num-units 1000000 --seed 7 --time-series
+
+The partitions form one register. Each gets results/<name>/residual_risk.parquet plus per-method
+chart aggregates as CSV; results/combined/ holds the aggregates across all partitions (unless a unit
+ID repeats across them) and results/batch_summary.json the per-partition timings and failures. The
+exit code is 1 if any partition failed or the partitions could not be combined.
+"""
+import argparse
+import os
+import sys
+
+from application_pages.methods import method_names
+from application_pages.pipeline import run_batch
+
+
+def input_tasks(paths):
+    """Expands input paths into partition tasks; a directory yields one task per register file in it."""
+    from application_pages.ingest import FORMATS # pyarrow's readers load only when there are files to ingest
+    tasks = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(tuple(FORMATS)))
+            prefix = os.path.basename(os.path.normpath(path))
+            tasks.extend({'name': f"{prefix}-{os.path.splitext(os.path.basename(f))[0]}", 'path': f} for f in files)
+        else:
+            tasks.append({'name': os.path.splitext(os.path.basename(path))[0], 'path': path})
+    return tasks
+
+
+def generate_tasks(count, num_units, has_time_series, seed, compact):
+    """Builds tasks for `count` consecutive num_units-unit partitions of one seeded synthetic register."""
+    return [{'name': f"register-{i:04d}",
+             'generate': {'start': i * num_units, 'stop': (i + 1) * num_units, 'has_time_series': has_time_series,
+                          'seed': seed, 'compact': compact}}
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output_dir', help='Directory for per-partition results and the batch summary.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--inputs', nargs='+', help='Parquet/CSV files or directories of part files to score.')
+    source.add_argument('--generate', type=int, metavar='N', help='Generate and score a synthetic register in N partitions.')
+    parser.add_argument('--num-units', type=int, default=100_000, help='Units per generated partition.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generated register.')
+    parser.add_argument('--time-series', action='store_true', help='Include Assessment_Cycle in the generated register.')
+    parser.add_argument('--compact', action='store_true', help='Generate the register with the compact schema.')
+    parser.add_argument('--methods', nargs='+', default=method_names(), choices=method_names())
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (default: CPU count; 1 runs in-process).')
+    args = parser.parse_args()
+
+    if args.inputs:
+        tasks = input_tasks(args.inputs)
+    else:
+        tasks = generate_tasks(args.generate, args.num_units, args.time_series, args.seed, args.compact)
+    if not tasks:
+        parser.error("No partitions to process.")
+
+    def report(summary):
+        timings = ', '.join(f"{stage} {seconds:.3f}s" for stage, seconds in summary['timings'].items())
+        if summary['status'] == 'ok':
+            print(f"[ok]     {summary['name']}: {summary['rows']} rows ({timings})")
+        else:
+            print(f"[failed] {summary['name']}: {summary['error']}")
+
+    summaries, combined_error = run_batch(tasks, args.output_dir, methods=args.methods, max_workers=args.workers,
+                                          progress=report)
+    failed = sum(summary['status'] != 'ok' for summary in summaries)
+    if combined_error:
+        print(f"[failed] combined: {combined_error}")
+    print(f"{len(summaries) - failed}/{len(summaries)} partitions succeeded; summary in "
+          f"{os.path.join(args.output_dir, 'batch_summary.json')}")
+    sys.exit(1 if failed or combined_error else 0)
+
+
+if __name__ == '__main__':
+    main()
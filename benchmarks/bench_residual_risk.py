@@ -0,0 +1,101 @@
+"""Compares the lookup-table calculate_residual_risk against the original per-row .apply path.
+
+Run from the repository root:
+
+    python benchmarks/bench_residual_risk.py --max-rows 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from application_pages.methods import calculate_residual_risk
+
+
+def map_basic_residual(score):
+    if score <= 0:
+        return 'Low'
+    elif score == 1:
+        return 'Medium'
+    else:
+        return 'High'
+
+
+def map_weighted_residual(score):
+    if score <= 1.0:
+        return 'Low'
+    elif score <= 2.0:
+        return 'Medium'
+    else:
+        return 'High'
+
+
+def calculate_residual_risk_legacy(df, calculation_method):
+    """The original Series.map + per-row .apply implementation, kept here as the reference path."""
+    inherent_risk_score_map = {'Low': 1, 'Medium': 2, 'High': 3, 'Very High': 4}
+    control_effectiveness_score_map = {'Low': 1, 'Medium': 2, 'High': 3}
+
+    df_copy = df.copy()
+    df_copy['Inherent_Risk_Score'] = df_copy['Inherent_Risk_Rating'].map(inherent_risk_score_map)
+    df_copy['Control_Effectiveness_Score'] = df_copy['Control_Effectiveness_Rating'].map(control_effectiveness_score_map)
+
+    if calculation_method == 'Basic':
+        df_copy['Residual_Risk_Score'] = df_copy['Inherent_Risk_Score'] - df_copy['Control_Effectiveness_Score']
+        df_copy['Residual_Risk_Rating'] = df_copy['Residual_Risk_Score'].apply(map_basic_residual)
+    elif calculation_method == 'Weighted':
+        df_copy['Residual_Risk_Score'] = df_copy['Inherent_Risk_Score'] / df_copy['Control_Effectiveness_Score']
+        df_copy['Residual_Risk_Rating'] = df_copy['Residual_Risk_Score'].apply(map_weighted_residual)
+
+    return df_copy.drop(columns=['Inherent_Risk_Score', 'Control_Effectiveness_Score'])
+
+
+def make_ratings_frame(num_rows, seed=0):
+    """Builds a frame holding only the two rating columns the calculation reads."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Inherent_Risk_Rating': rng.choice(['Low', 'Medium', 'High', 'Very High'], num_rows),
+        'Control_Effectiveness_Rating': rng.choice(['Low', 'Medium', 'High'], num_rows),
+    })
+
+
+def time_call(fn, *args, repeat=3):
+    """Returns the best wall time over `repeat` calls, plus the last result."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--min-rows', type=int, default=1_000)
+    parser.add_argument('--max-rows', type=int, default=10_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sizes = []
+    n = args.min_rows
+    while n <= args.max_rows:
+        sizes.append(n)
+        n *= 10
+
+    print(f"{'rows':>10} {'method':>9} {'legacy (s)':>11} {'lookup (s)':>11} {'speedup':>8} {'equal':>6}")
+    for num_rows in sizes:
+        df = make_ratings_frame(num_rows)
+        for method in ('Basic', 'Weighted'):
+            legacy_time, expected = time_call(calculate_residual_risk_legacy, df, method, repeat=args.repeat)
+            lookup_time, actual = time_call(calculate_residual_risk, df, method, repeat=args.repeat)
+            equal = expected.equals(actual)
+            print(f"{num_rows:>10} {method:>9} {legacy_time:>11.4f} {lookup_time:>11.4f} "
+                  f"{legacy_time / lookup_time:>7.1f}x {str(equal):>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Measures cold start: headless import of the compute modules and the app's first page renders.
+
+Every measurement runs in a fresh interpreter, so nothing is already imported. From the repository root:
+
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --output new.json --baseline startup.json --threshold 0.25
+
+'import' rows time `import <module>` for every Streamlit-free module (everything in application_pages
+except the pages and the performance panel, plus batch.py) and record which heavy dependencies it
+loaded. A core module that pulls in Streamlit or altair fails the run (exit code 1), as does any
+row more than --threshold slower than the baseline. 'render' rows time the first AppTest run of
+app.py (the landing page, after importing Streamlit), then the first visit of every other page in
+the same session, including the import of its page module.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+UI_MODULES = {'page1', 'page2', 'page3', 'page4', 'page5', 'performance_panel'}
+FORBIDDEN_IN_CORE = ('streamlit', 'altair')
+HEAVY_MODULES = FORBIDDEN_IN_CORE + ('pandas', 'pyarrow.parquet', 'pyarrow.csv')
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'wall_time_s': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+_RENDER_PROBE = """
+import json, time
+rows = []
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+rows.append(('streamlit import', time.perf_counter() - start))
+at = AppTest.from_file({app!r}, default_timeout=300)
+start = time.perf_counter()
+at.run()
+rows.append((at.sidebar.selectbox[0].value, time.perf_counter() - start))
+for page in at.sidebar.selectbox[0].options[1:]:
+    start = time.perf_counter()
+    at.sidebar.selectbox[0].set_value(page).run()
+    rows.append((page, time.perf_counter() - start))
+errors = [element.value for element in at.exception]
+print(json.dumps({{'rows': rows, 'errors': errors}}))
+"""
+
+
+def core_modules():
+    """The importable names of every Streamlit-free module, by convention everything but the UI modules."""
+    names = sorted(name[:-3] for name in os.listdir(os.path.join(ROOT, 'application_pages'))
+                   if name.endswith('.py') and name[:-3] not in UI_MODULES and name != '__init__.py')
+    return [f'application_pages.{name}' for name in names] + ['batch']
+
+
+def run_probe(code):
+    """Runs code in a fresh interpreter from the repository root; returns (its JSON output, process wall time)."""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                               env={**os.environ, 'PYTHONPATH': ROOT})
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"Probe failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), elapsed
+
+
+def bench_imports(repeat):
+    rows = []
+    for module in core_modules():
+        runs = [run_probe(_IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)) for _ in range(repeat)]
+        best, process = min(runs, key=lambda run: run[0]['wall_time_s'])
+        rows.append({'kind': 'import', 'target': module, 'wall_time_s': best['wall_time_s'],
+                     'process_wall_time_s': process, 'loaded': best['loaded']})
+    return rows
+
+
+def bench_render(repeat):
+    """Best of repeat fresh-process runs for each render step."""
+    best = {}
+    for _ in range(repeat):
+        output, _ = run_probe(_RENDER_PROBE.format(app=os.path.join(ROOT, 'app.py')))
+        if output['errors']:
+            raise RuntimeError(f"App raised during render: {output['errors']}")
+        for target, elapsed in output['rows']:
+            best[target] = min(elapsed, best.get(target, float('inf')))
+    return [{'kind': 'render', 'target': target, 'wall_time_s': elapsed} for target, elapsed in best.items()]
+
+
+def compare(results, baseline, threshold, min_time):
+    """Returns (key, baseline time, new time, ratio) for every row slower than baseline * (1 + threshold)."""
+    baseline_times = {(row['kind'], row['target']): row['wall_time_s'] for row in baseline['results']}
+    regressions = []
+    for row in results['results']:
+        old = baseline_times.get((row['kind'], row['target']))
+        if old is None or max(old, row['wall_time_s']) < min_time:
+            continue
+        if row['wall_time_s'] > old * (1 + threshold):
+            regressions.append(((row['kind'], row['target']), old, row['wall_time_s'], row['wall_time_s'] / old))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh-process runs per measurement; the best is kept.')
+    parser.add_argument('--skip-render', action='store_true', help='Only time the headless imports.')
+    parser.add_argument('--output', default='startup_output.json', help='Where to write the JSON results.')
+    parser.add_argument('--baseline', help='A previous results file to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed fractional slowdown before a row counts as a regression.')
+    parser.add_argument('--min-time', type=float, default=0.02, help='Ignore rows faster than this many seconds in both runs.')
+    args = parser.parse_args()
+
+    rows = bench_imports(args.repeat)
+    if not args.skip_render:
+        rows.extend(bench_render(args.repeat))
+    for row in rows:
+        loaded = f"  loads {', '.join(row['loaded'])}" if row.get('loaded') else ''
+        print(f"{row['kind']:>6} {row['target']:<40} {row['wall_time_s'] * 1000:8.1f} ms{loaded}")
+
+    results = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': rows,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {len(rows)} measurements to {args.output}")
+
+    failed = False
+    for row in rows:
+        leaked = [name for name in row.get('loaded', []) if name in FORBIDDEN_IN_CORE]
+        if row['kind'] == 'import' and leaked:
+            print(f"HEAVY IMPORT {row['target']} loads {', '.join(leaked)}; import it lazily or keep it out of the core")
+            failed = True
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_time)
+        for (kind, target), old, new, ratio in regressions:
+            print(f"REGRESSION {kind} {target}: {old:.4f}s -> {new:.4f}s ({ratio:.2f}x)")
+        if regressions:
+            failed = True
+        else:
+            print(f"No regressions above {args.threshold:.0%} against {args.baseline}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""Times the generate -> validate -> calculate -> plot pipeline and compares runs against a baseline.
+
+Runs headless (no Streamlit server). From the repository root:
+
+    python benchmarks/run_benchmarks.py --sizes 100 1000 10000 100000 --output bench.json
+    python benchmarks/run_benchmarks.py --output new.json --baseline bench.json --threshold 0.25
+
+Each stage is timed (best of --repeat runs) without tracing, then run once more under tracemalloc
+for its peak traced allocation. Peak process RSS (a high-water mark for the whole run) is read from
+getrusage after each stage, and the plot stages are timed through serialization and record the size
+of the Vega-Lite spec. With --baseline, any stage whose wall
+time exceeds the baseline by more than --threshold (fractional) is reported and the exit code is 1.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from application_pages.generation import generate_synthetic_data, validate_data
+from application_pages.methods import calculate_residual_risk
+from application_pages.aggregations import aggregate_scatter, aggregate_trend, aggregate_heatmap
+from application_pages.charts import relationship_scatter_chart, trend_line_chart, heatmap_chart
+
+try:
+    import resource
+except ImportError: # Windows: peak RSS is not reported
+    resource = None
+
+DEFAULT_SIZES = [10 ** k for k in range(2, 8)]
+METHODS = ('Basic', 'Weighted')
+# The page3 charts, built from the Streamlit-free aggregation and chart modules so no Streamlit is loaded
+PLOTS = {
+    'plot_scatter': lambda df: relationship_scatter_chart(*aggregate_scatter(df)),
+    'plot_trend': lambda df: trend_line_chart(aggregate_trend(df)),
+    'plot_heatmap': lambda df: heatmap_chart(aggregate_heatmap(df)),
+}
+SEED = 12345
+
+
+def peak_rss_bytes():
+    """Returns the process's peak resident set size so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024 # Linux reports KiB, macOS bytes
+
+
+def chart_spec_bytes(chart):
+    """Returns the size of the chart's serialized Vega-Lite JSON, i.e. what is shipped to the browser."""
+    return len(json.dumps(chart.to_dict())) if chart is not None else 0
+
+
+def measure(fn, repeat):
+    """Runs fn `repeat` times for the best wall time, then once under tracemalloc for peak memory."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak_traced = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {'wall_time_s': best, 'peak_traced_bytes': peak_traced, 'peak_rss_bytes': peak_rss_bytes()}
+
+
+def bench_size(num_units, has_time_series, compact, repeat):
+    """Benchmarks every stage and the end-to-end pipeline for one dataset configuration."""
+    config = {'num_units': num_units, 'has_time_series': has_time_series, 'compact': compact}
+    rows = []
+
+    def record(stage, metrics, method=None, **extra):
+        rows.append({'stage': stage, 'method': method, **config, **metrics, **extra})
+
+    df, metrics = measure(lambda: generate_synthetic_data(num_units, has_time_series, seed=SEED, compact=compact), repeat)
+    record('generate', metrics)
+
+    _, metrics = measure(lambda: validate_data(df), repeat)
+    record('validate', metrics)
+
+    for method in METHODS:
+        calculated, metrics = measure(lambda: calculate_residual_risk(df, method), repeat)
+        record('calculate', metrics, method)
+
+        for stage, plot in PLOTS.items():
+            if stage == 'plot_trend' and not has_time_series:
+                continue
+            # Timed through serialization, since building the spec JSON is part of rendering the chart
+            spec_bytes, metrics = measure(lambda: chart_spec_bytes(plot(calculated)), repeat)
+            record(stage, metrics, method, chart_spec_bytes=spec_bytes)
+
+        def pipeline():
+            data = generate_synthetic_data(num_units, has_time_series, seed=SEED, compact=compact)
+            validate_data(data)
+            result = calculate_residual_risk(data, method)
+            return sum(chart_spec_bytes(plot(result)) for stage, plot in PLOTS.items()
+                       if has_time_series or stage != 'plot_trend')
+
+        spec_bytes, metrics = measure(pipeline, repeat)
+        record('pipeline', metrics, method, chart_spec_bytes=spec_bytes)
+
+    return rows
+
+
+def result_key(row):
+    return (row['stage'], row['method'], row['num_units'], row['has_time_series'], row['compact'])
+
+
+def compare(results, baseline, threshold, min_time):
+    """Returns (key, baseline time, new time, ratio) for every stage slower than baseline * (1 + threshold)."""
+    baseline_times = {result_key(row): row['wall_time_s'] for row in baseline['results']}
+    regressions = []
+    for row in results['results']:
+        old = baseline_times.get(result_key(row))
+        if old is None or max(old, row['wall_time_s']) < min_time:
+            continue # New configuration, or both timings are below the noise floor
+        if row['wall_time_s'] > old * (1 + threshold):
+            regressions.append((result_key(row), old, row['wall_time_s'], row['wall_time_s'] / old))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Numbers of units to benchmark.')
+    parser.add_argument('--time-series', choices=['on', 'off', 'both'], default='both')
+    parser.add_argument('--compact', action='store_true', help='Use the compact categorical/int8 schema.')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage; the best is kept.')
+    parser.add_argument('--output', default='bench_output.json', help='Where to write the JSON results.')
+    parser.add_argument('--baseline', help='A previous results file to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed fractional slowdown before a stage counts as a regression.')
+    parser.add_argument('--min-time', type=float, default=0.005, help='Ignore stages faster than this many seconds in both runs.')
+    args = parser.parse_args()
+
+    time_series_options = {'on': [True], 'off': [False], 'both': [False, True]}[args.time_series]
+    rows = []
+    for num_units in args.sizes:
+        for has_time_series in time_series_options:
+            size_rows = bench_size(num_units, has_time_series, args.compact, args.repeat)
+            rows.extend(size_rows)
+            for row in size_rows:
+                if row['stage'] == 'pipeline':
+                    print(f"{num_units:>10} units, time series {'on' if has_time_series else 'off'}, "
+                          f"{row['method']}: pipeline {row['wall_time_s']:.4f}s, {row['chart_spec_bytes']} spec bytes")
+
+    results = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': rows,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {len(rows)} measurements to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_time)
+        for (stage, method, num_units, has_time_series, compact), old, new, ratio in regressions:
+            print(f"REGRESSION {stage} method={method} units={num_units} time_series={has_time_series} "
+                  f"compact={compact}: {old:.4f}s -> {new:.4f}s ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from application_pages.aggregations import (add_chart_counts, chart_counts, heatmap_from_counts, scatter_from_counts,
+                                            trend_from_counts)
+from application_pages.generation import generate_synthetic_data
+from application_pages.methods import attach_residuals, compute_residuals
+
+FINISHERS = {'scatter': scatter_from_counts, 'heatmap': heatmap_from_counts, 'trend': trend_from_counts}
+
+
+@pytest.fixture(scope='module')
+def scored():
+    df = generate_synthetic_data(400, True, seed=5, compact=True)
+    return attach_residuals(df, compute_residuals(df, ['Basic'])['Basic'])
+
+
+def assert_same_charts(counts, expected):
+    assert set(counts) == set(expected)
+    for name, table in counts.items():
+        assert table.dtypes.to_dict() == expected[name].dtypes.to_dict()
+        pd.testing.assert_frame_equal(FINISHERS[name](table), FINISHERS[name](expected[name]))
+
+
+@pytest.mark.parametrize('split', [3, 200, 399])
+def test_adding_the_added_units_matches_counting_the_whole(scored, split):
+    grown = add_chart_counts(chart_counts(scored.iloc[:split]), chart_counts(scored.iloc[split:]))
+    assert_same_charts(grown, chart_counts(scored))
+
+
+@pytest.mark.parametrize('split', [3, 200, 399])
+def test_removing_the_removed_units_matches_counting_the_rest(scored, split):
+    shrunk = add_chart_counts(chart_counts(scored), chart_counts(scored.iloc[split:]), sign=-1)
+    assert_same_charts(shrunk, chart_counts(scored.iloc[:split]))
+
+
+def test_new_complexity_values_extend_the_index(scored):
+    low = scored[scored['Process_Complexity'] <= 5]
+    high = scored[scored['Process_Complexity'] > 5]
+    combined = add_chart_counts(chart_counts(low), chart_counts(high))
+    assert not chart_counts(low)['scatter'].index.equals(chart_counts(high)['scatter'].index)
+    assert_same_charts(combined, chart_counts(pd.concat([low, high])))
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from application_pages.datastore import DatasetStore
+
+
+def test_acquire_and_derived_count_hits_and_misses():
+    store = DatasetStore()
+    first = store.acquire('key', lambda: pd.DataFrame({'a': [1, 2]}))
+    second = store.acquire('key', lambda: pd.DataFrame({'a': [3]}))
+    assert store.stats()['hits'] == 1 and store.stats()['misses'] == 1
+
+    assert first.derived('total', lambda df: df['a'].sum()) == 3
+    assert second.derived('total', lambda df: -1) == 3
+    assert store.counters('total') == {'hits': 1, 'misses': 1}
+    assert store.counters('other') == {'hits': 0, 'misses': 0}
+
+
+def test_failed_load_counts_a_miss_and_stores_nothing():
+    store = DatasetStore()
+
+    def load():
+        raise ValueError("bad register")
+
+    try:
+        store.acquire('key', load)
+    except ValueError:
+        pass
+    assert 'key' not in store
+    assert store.stats()['misses'] == 1
+
+
+def test_writes_through_a_handle_leave_the_stored_frame_alone():
+    store = DatasetStore()
+    handle = store.acquire('key', lambda: pd.DataFrame({'a': [1, 2]}))
+    df = handle.df
+    df.loc[0, 'a'] = 99
+    df['b'] = 0
+    assert handle.df['a'].tolist() == [1, 2]
+    assert list(handle.df.columns) == ['a']
+    assert handle.derived('first', lambda stored: stored.iloc[0, 0]) == 1
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from application_pages.generation import SEED_BLOCK_SIZE, generate_synthetic_data, generate_unit_range
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_empty_register_keeps_the_schema(compact):
+    empty = generate_synthetic_data(0, True, seed=1, compact=compact)
+    full = generate_synthetic_data(5, True, seed=1, compact=compact)
+    assert len(empty) == 0
+    assert empty.dtypes.to_dict() == full.dtypes.to_dict()
+
+
+def test_empty_range_past_the_first_block():
+    assert len(generate_unit_range(SEED_BLOCK_SIZE + 7, SEED_BLOCK_SIZE + 7, False, seed=1)) == 0
+
+
+def test_ranges_across_a_block_boundary_match_the_full_register():
+    start, stop = SEED_BLOCK_SIZE - 3, SEED_BLOCK_SIZE + 3
+    full = generate_synthetic_data(stop, True, seed=2)
+    pd.testing.assert_frame_equal(generate_unit_range(start, stop, True, seed=2),
+                                  full.iloc[start:].reset_index(drop=True))
@@ -0,0 +1,86 @@
+import pytest
+
+from application_pages.generation import generate_synthetic_data
+from application_pages.ingest import ingest_register
+from application_pages.schema import to_compact
+
+
+@pytest.fixture
+def register():
+    return generate_synthetic_data(200, True, seed=3)
+
+
+@pytest.mark.parametrize('extension', ['parquet', 'csv', 'arrow'])
+def test_round_trip_matches_compact_schema(tmp_path, register, extension):
+    path = tmp_path / f'register.{extension}'
+    if extension == 'parquet':
+        register.to_parquet(path, index=False)
+    elif extension == 'csv':
+        register.to_csv(path, index=False)
+    else:
+        register.to_feather(path)
+    result = ingest_register(str(path), batch_size=64)
+    assert result.report.ok
+    assert result.df.equals(to_compact(register))
+
+
+@pytest.mark.parametrize('extension', ['parquet', 'csv'])
+def test_missing_categorical_column_is_reported(tmp_path, register, extension):
+    path = tmp_path / f'register.{extension}'
+    register = register.drop(columns='Control_Type')
+    if extension == 'parquet':
+        register.to_parquet(path, index=False)
+    else:
+        register.to_csv(path, index=False)
+    result = ingest_register(str(path))
+    assert result.df is None
+    assert result.report.messages() == ['Missing column: Control_Type']
+
+
+@pytest.mark.parametrize('extension', ['parquet', 'csv', 'arrow'])
+def test_empty_register_still_validates_columns(tmp_path, register, extension):
+    path = tmp_path / f'register.{extension}'
+    empty = register.iloc[:0].drop(columns='Inherent_Risk_Rating')
+    if extension == 'parquet':
+        empty.to_parquet(path, index=False)
+    elif extension == 'csv':
+        empty.to_csv(path, index=False)
+    else:
+        empty.reset_index(drop=True).to_feather(path)
+    result = ingest_register(str(path))
+    assert result.df is None
+    assert result.report.messages() == ['Missing column: Inherent_Risk_Rating']
+
+
+def test_empty_register_with_every_column_keeps_the_schema(tmp_path, register):
+    path = tmp_path / 'register.csv'
+    register.iloc[:0].to_csv(path, index=False)
+    result = ingest_register(str(path))
+    assert result.report.ok
+    assert len(result.df) == 0
+    assert list(result.df.columns) == list(register.columns)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+def test_integer_columns_written_as_floats_are_narrowed(tmp_path, register, extension):
+    path = tmp_path / f'register.{extension}'
+    integer_columns = ['Risk_Assessment_Unit_ID', 'Process_Complexity', 'Assessment_Cycle']
+    as_floats = register.astype({col: 'float64' for col in integer_columns})
+    if extension == 'csv':
+        as_floats.to_csv(path, index=False)
+        assert '2020.0' in path.read_text() or '2021.0' in path.read_text()
+    else:
+        as_floats.to_parquet(path, index=False)
+    result = ingest_register(str(path), batch_size=64)
+    assert result.report.ok
+    assert result.df.equals(to_compact(register))
+
+
+def test_fractional_integer_column_is_kept_for_validation(tmp_path, register):
+    path = tmp_path / 'register.csv'
+    register = register.astype({'Process_Complexity': 'float64'})
+    register.loc[5, 'Process_Complexity'] = 2.5
+    register.to_csv(path, index=False)
+    result = ingest_register(str(path), batch_size=64)
+    assert result.report.ok
+    assert result.df['Process_Complexity'].iloc[5] == 2.5
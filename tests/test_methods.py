@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages import methods
+from application_pages.generation import generate_synthetic_data
+from application_pages.methods import (applicable_methods, calculate_residual_risk, compute_residuals, rate_scores,
+                                       register_method)
+from application_pages.schema import to_compact
+
+INHERENT = ['Low', 'Medium', 'High', 'Very High']
+CONTROL = ['Low', 'Medium', 'High']
+
+
+def legacy_calculate_residual_risk(df, calculation_method):
+    """The original page2 implementation (Series.map + per-row .apply), the reference for Basic and Weighted."""
+    if calculation_method not in ['Basic', 'Weighted']:
+        raise ValueError("Invalid calculation_method. Choose 'Basic' or 'Weighted'.")
+    inherent_risk_score_map = {'Low': 1, 'Medium': 2, 'High': 3, 'Very High': 4}
+    control_effectiveness_score_map = {'Low': 1, 'Medium': 2, 'High': 3}
+
+    df_copy = df.copy()
+    df_copy['Inherent_Risk_Score'] = df_copy['Inherent_Risk_Rating'].map(inherent_risk_score_map)
+    if df_copy['Inherent_Risk_Score'].isnull().any():
+        invalid_ratings = df_copy[df_copy['Inherent_Risk_Score'].isnull()]['Inherent_Risk_Rating'].unique()
+        raise ValueError(f"Invalid Inherent_Risk_Rating values: {invalid_ratings}. Allowed values are: {list(inherent_risk_score_map.keys())}")
+    df_copy['Control_Effectiveness_Score'] = df_copy['Control_Effectiveness_Rating'].map(control_effectiveness_score_map)
+    if df_copy['Control_Effectiveness_Score'].isnull().any():
+        invalid_ratings = df_copy[df_copy['Control_Effectiveness_Score'].isnull()]['Control_Effectiveness_Rating'].unique()
+        raise ValueError(f"Invalid Control_Effectiveness_Rating values: {invalid_ratings}. Allowed values are: {list(control_effectiveness_score_map.keys())}")
+
+    if calculation_method == 'Basic':
+        df_copy['Residual_Risk_Score'] = df_copy['Inherent_Risk_Score'] - df_copy['Control_Effectiveness_Score']
+        df_copy['Residual_Risk_Rating'] = df_copy['Residual_Risk_Score'].apply(
+            lambda score: 'Low' if score <= 0 else 'Medium' if score == 1 else 'High')
+    else:
+        df_copy['Residual_Risk_Score'] = df_copy['Inherent_Risk_Score'] / df_copy['Control_Effectiveness_Score']
+        df_copy['Residual_Risk_Rating'] = df_copy['Residual_Risk_Score'].apply(
+            lambda score: 'Low' if score <= 1.0 else 'Medium' if score <= 2.0 else 'High')
+    return df_copy.drop(columns=['Inherent_Risk_Score', 'Control_Effectiveness_Score'])
+
+
+def grid_frame():
+    """One unit per inherent x control cell."""
+    return pd.DataFrame({'Inherent_Risk_Rating': np.repeat(INHERENT, len(CONTROL)),
+                         'Control_Effectiveness_Rating': np.tile(CONTROL, len(INHERENT))})
+
+
+def legacy_error(df, method):
+    with pytest.raises(ValueError) as legacy:
+        legacy_calculate_residual_risk(df, method)
+    return str(legacy.value)
+
+
+@pytest.fixture
+def scratch_methods():
+    """Registers test methods and removes them again afterwards."""
+    names = []
+
+    def register(name, *args, **kwargs):
+        names.append(name)
+        return register_method(name, *args, **kwargs)
+
+    yield register
+    for name in names:
+        methods.RESIDUAL_METHODS.pop(name, None)
+        methods._LOOKUP_TABLES.pop(name, None)
+
+
+@pytest.mark.parametrize('method', ['Basic', 'Weighted'])
+def test_matches_legacy_on_every_grid_cell(method):
+    df = grid_frame()
+    pd.testing.assert_frame_equal(calculate_residual_risk(df, method), legacy_calculate_residual_risk(df, method))
+
+
+@pytest.mark.parametrize('method', ['Basic', 'Weighted'])
+def test_matches_legacy_on_a_generated_register(method):
+    df = generate_synthetic_data(500, True, seed=9)
+    expected = legacy_calculate_residual_risk(df, method)
+    pd.testing.assert_frame_equal(calculate_residual_risk(df, method), expected)
+    compact = calculate_residual_risk(to_compact(df), method)
+    assert (compact['Residual_Risk_Rating'].astype(str) == expected['Residual_Risk_Rating']).all()
+    np.testing.assert_allclose(compact['Residual_Risk_Score'].astype(float), expected['Residual_Risk_Score'], rtol=1e-6)
+
+
+@pytest.mark.parametrize('column, bad', [('Inherent_Risk_Rating', 'Severe'), ('Control_Effectiveness_Rating', 'Very High'),
+                                         ('Inherent_Risk_Rating', np.nan), ('Control_Effectiveness_Rating', None)])
+def test_invalid_and_missing_ratings_raise_the_legacy_error(column, bad):
+    df = grid_frame().astype(object)
+    df.loc[4, column] = bad
+    with pytest.raises(ValueError) as error:
+        calculate_residual_risk(df, 'Basic')
+    assert str(error.value) == legacy_error(df, 'Basic')
+
+
+def test_unknown_method_raises_the_legacy_error():
+    with pytest.raises(ValueError) as error:
+        calculate_residual_risk(grid_frame(), 'Median')
+    assert str(error.value) == legacy_error(grid_frame(), 'Median')
+
+
+def test_scores_on_a_threshold_fall_in_the_lower_bin():
+    thresholds = np.array([0.5, 1.5])
+    scores = np.array([-1.0, 0.5, np.nextafter(0.5, 1), 1.5, np.nextafter(1.5, 2), 9.0])
+    assert rate_scores(scores, thresholds).tolist() == [0, 0, 1, 1, 2, 2]
+
+
+def test_per_unit_column_method(scratch_methods):
+    scratch_methods('Complexity-Adjusted',
+                    lambda x: x['inherent_score'] - x['control_score'] + (x['Process_Complexity'] >= 8),
+                    thresholds=[0, 1], columns=['Process_Complexity'])
+    df = grid_frame().assign(Process_Complexity=[8, 1] * 6)
+    residuals = compute_residuals(df, ['Basic', 'Complexity-Adjusted'])
+    basic, adjusted = residuals['Basic'], residuals['Complexity-Adjusted']
+    assert (adjusted['Residual_Risk_Score'] - basic['Residual_Risk_Score']).tolist() == [1, 0] * 6
+    expected = np.array(['Low', 'Medium', 'High'])[rate_scores(adjusted['Residual_Risk_Score'].to_numpy(), [0, 1])]
+    assert adjusted['Residual_Risk_Rating'].tolist() == expected.tolist()
+
+
+def test_method_missing_its_column(scratch_methods):
+    scratch_methods('Metric-Weighted', lambda x: x['inherent_score'] * x['Operational_Metric_1'],
+                    thresholds=[50, 100], columns=['Operational_Metric_1'])
+    df = grid_frame()
+    assert 'Metric-Weighted' not in applicable_methods(df)
+    with pytest.raises(ValueError, match=r"Method 'Metric-Weighted' needs column\(s\) \['Operational_Metric_1'\]"):
+        compute_residuals(df, ['Metric-Weighted'])
+
+
+@pytest.mark.parametrize('thresholds', [[1], [2, 1], [0, 1, 2]])
+def test_register_rejects_bad_thresholds(thresholds):
+    with pytest.raises(ValueError, match='ascending cut points'):
+        register_method('Bad', lambda x: x['inherent_score'], thresholds=thresholds)
+    assert 'Bad' not in methods.RESIDUAL_METHODS
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages import methods, monte_carlo
+from application_pages.monte_carlo import _draw_codes, simulate_portfolios
+
+
+def test_workers_do_not_change_results():
+    serial = simulate_portfolios(300, 50, 'Weighted', seed=11, max_workers=1)
+    pooled = simulate_portfolios(300, 50, 'Weighted', seed=11, max_workers=2)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+def test_batch_size_does_not_change_results(monkeypatch):
+    whole = simulate_portfolios(300, 50, seed=11)
+    monkeypatch.setattr(monte_carlo, 'MAX_BATCH_CELLS', 50 * monte_carlo.SCENARIO_SEED_BLOCK) # One seed block per batch
+    pd.testing.assert_frame_equal(simulate_portfolios(300, 50, seed=11), whole)
+
+
+def test_seed_reproduces_and_differs():
+    first = simulate_portfolios(100, 20, seed=3)
+    pd.testing.assert_frame_equal(simulate_portfolios(100, 20, seed=3), first)
+    assert not simulate_portfolios(100, 20, seed=4).equals(first)
+
+
+@pytest.mark.parametrize('inherent, control, column', [([0, 0, 0, 1], [1, 0, 0], 'Share_High'),
+                                                       ([0, 1, 0, 0], [0, 0, 1], 'Share_Low')])
+def test_point_mass_probabilities_take_the_cdf_path(inherent, control, column):
+    scenarios = simulate_portfolios(70, 30, seed=1, inherent_probabilities=inherent, control_probabilities=control)
+    assert (scenarios[column] == 1.0).all()
+
+
+def test_cdf_draws_follow_the_probabilities():
+    probabilities = np.array([0.5, 0.0, 0.3, 0.2])
+    codes = _draw_codes(np.random.default_rng(0), probabilities, (200, 1000))
+    frequencies = np.bincount(codes.ravel(), minlength=len(probabilities)) / codes.size
+    np.testing.assert_allclose(frequencies, probabilities, atol=0.005)
+
+
+def test_per_unit_column_methods_are_rejected():
+    methods.register_method('Complexity-Adjusted', lambda x: x['inherent_score'] + x['Process_Complexity'],
+                            thresholds=[2, 5], columns=['Process_Complexity'])
+    try:
+        with pytest.raises(ValueError, match='uses per-unit columns'):
+            simulate_portfolios(10, 10, 'Complexity-Adjusted', seed=1)
+    finally:
+        methods.RESIDUAL_METHODS.pop('Complexity-Adjusted')
+        methods._LOOKUP_TABLES.pop('Complexity-Adjusted', None)
+
+
+@pytest.mark.parametrize('kwargs', [{'inherent_probabilities': [0.5, 0.5, 0.5, 0]},
+                                    {'control_probabilities': [1.0, 0.0]},
+                                    {'num_units': 0}])
+def test_bad_arguments_raise(kwargs):
+    with pytest.raises(ValueError):
+        simulate_portfolios(**{'num_scenarios': 10, 'num_units': 10, 'seed': 1, **kwargs})
@@ -0,0 +1,20 @@
+import numpy as np
+
+from application_pages.panel import RiskPanel, _step
+
+
+def test_generated_ratings_stay_within_generator_levels():
+    panel = RiskPanel.generate(5000, 12, seed=1)
+    for cycle in panel.cycles:
+        assert (panel.cycle_frame(cycle)['Inherent_Risk_Rating'] != 'Very High').all()
+
+
+def test_generated_trend_has_no_built_in_drift():
+    trend = RiskPanel.generate(20000, 30, seed=1).trend('Basic')['Residual_Risk_Rating_Numerical']
+    assert abs(trend.iloc[-1] - trend.iloc[0]) < 0.03
+
+
+def test_step_keeps_loaded_levels_above_the_walk():
+    values = np.array([3, 3, 3, 2, 0], dtype=np.int8)
+    uniforms = np.array([0.99, 0.01, 0.5, 0.99, 0.01], dtype=np.float32)
+    assert _step(values, uniforms, 0.2, 0, 2).tolist() == [3, 2, 3, 2, 0]
@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+from application_pages.generation import generate_synthetic_data
+from application_pages.pipeline import chart_aggregates, residual_stage, run_batch
+from application_pages.methods import attach_residuals
+
+
+def _tasks(count, num_units, seed=4):
+    return [{'name': f'part-{i}', 'generate': {'start': i * num_units, 'stop': (i + 1) * num_units,
+                                              'has_time_series': True, 'seed': seed, 'compact': True}}
+            for i in range(count)]
+
+
+def test_combined_aggregates_match_the_whole_register(tmp_path):
+    summaries, combined_error = run_batch(_tasks(3, 150), str(tmp_path), methods=['Basic'], max_workers=1)
+    assert combined_error is None
+    assert [summary['status'] for summary in summaries] == ['ok'] * 3
+
+    register = generate_synthetic_data(450, True, seed=4, compact=True)
+    scored = attach_residuals(register, residual_stage(register, ['Basic'])['Basic'])
+    for name, expected in chart_aggregates(scored).items():
+        combined = pd.read_csv(os.path.join(tmp_path, 'combined', f'{name}_Basic.csv'))
+        pd.testing.assert_frame_equal(combined, expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_ids_repeated_across_partitions_block_the_combined_aggregates(tmp_path):
+    register = generate_synthetic_data(100, True, seed=4)
+    inputs = []
+    for name, part in (('a.csv', register.iloc[:60]), ('b.parquet', register.iloc[40:])):
+        path = tmp_path / name
+        if name.endswith('.csv'):
+            part.to_csv(path, index=False)
+        else:
+            part.to_parquet(path, index=False)
+        inputs.append({'name': name.split('.')[0], 'path': str(path)})
+    summaries, combined_error = run_batch(inputs, str(tmp_path / 'out'), methods=['Basic'], max_workers=1)
+    assert [summary['status'] for summary in summaries] == ['ok', 'ok']
+    assert combined_error.startswith("Duplicate Risk_Assessment_Unit_ID values found across partitions. (20 repeated IDs)")
+    assert not os.path.exists(tmp_path / 'out' / 'combined' / 'heatmap_Basic.csv')
+
+
+def test_invalid_input_fails_its_partition(tmp_path):
+    register = generate_synthetic_data(50, False, seed=4)
+    register.loc[3, 'Control_Type'] = 'Manual'
+    path = tmp_path / 'bad.csv'
+    register.to_csv(path, index=False)
+    (summary,), _ = run_batch([{'name': 'bad', 'path': str(path)}], str(tmp_path / 'out'), methods=['Basic'], max_workers=1)
+    assert summary['status'] == 'failed'
+    assert "Invalid Control_Type values: ['Manual']" in summary['error']
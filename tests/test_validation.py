@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages.generation import generate_synthetic_data
+from application_pages.validation import BITMAP_ID_LIMIT, SchemaValidator, UniqueIdTracker
+
+
+def _duplicates(*chunks):
+    tracker = UniqueIdTracker()
+    for chunk in chunks:
+        tracker.update(chunk)
+    return tracker.duplicates
+
+
+def test_unique_chunks_have_no_duplicates():
+    assert _duplicates(np.arange(1, 1001), np.arange(1001, 2001)) == 0
+
+
+def test_repeats_within_and_across_chunks():
+    assert _duplicates(np.array([1, 2, 2, 3]), np.array([3, 4, 1])) == 3
+
+
+def test_integral_floats_match_integer_ids():
+    assert _duplicates(np.array([1, 2, 3]), np.array([2.0, 3.0])) == 2
+    assert _duplicates(np.array([2.0, 3.0]), np.array([1, 2, 3])) == 2
+
+
+def test_fractional_floats_are_distinct_ids():
+    assert _duplicates(np.array([1, 2, 3]), np.array([2.5, 2.5, 3.0])) == 2
+
+
+def test_ids_outside_the_bitmap_range():
+    huge = BITMAP_ID_LIMIT + 10
+    assert _duplicates(np.array([-5, 0, huge]), np.array([-5.0, float(huge), 7])) == 2
+
+
+def test_sparse_ids_grow_the_bitmap():
+    assert _duplicates(np.array([3, 1_000_000]), np.array([5_000_000, 3]), np.array([1_000_000])) == 2
+
+
+@pytest.mark.parametrize('dtype', ['Int64', 'Float64', 'float64'])
+def test_validator_counts_duplicates_across_chunks_and_ignores_nulls(dtype):
+    df = generate_synthetic_data(10, False, seed=1)
+    ids = pd.array([1, 2, 3, None, 5, 6, 2, 8, None, 3], dtype=dtype)
+    df['Risk_Assessment_Unit_ID'] = ids
+    report = SchemaValidator().update(df.iloc[:5]).update(df.iloc[5:]).report()
+    assert report.messages()[0] == "Duplicate Risk_Assessment_Unit_ID values found. (2 repeated IDs)"